@@ -1,31 +1,142 @@
 # app.py
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-import pickle
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from typing import Any
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+import hmac
 import json
+import os
+import time
+from functools import partial
 import numpy as np
-import pandas as pd
-from util.logger import get_logger
+from util.logger import get_logger, LazyStr, PayloadSampler
+from util.batching import MicroBatcher
+from util.model_store import DEFAULT_MIN_AGREEMENT, ModelStore
+from util.memory import process_memory
+from util.cache import ResultCache, quantize_key
+from util.responses import FastJSONResponse, dumps, loads
+from util.fastpath import FastPathMiddleware, FallThrough
+from util.streaming import (
+    CSV_CONTENT_TYPES, NDJSON_CONTENT_TYPES, FullDuplexStreamingResponse,
+    iter_lines, csv_columns, parse_csv_rows, parse_ndjson_rows, stream_predictions,
+)
+from util.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, StageTimer, MetricsMiddleware
+from util.admission import AdmissionController, AdmissionMiddleware, INTERACTIVE, BULK, PRIORITY_NAMES
+from util.limits import BodyLimitMiddleware
+from util.validation import (
+    FLOAT32_CONTENT_TYPE, LIKERT_CONTENT_TYPE,
+    validate_features, valid_rows, decode_float32, decode_likert,
+)
 
-logger = get_logger(__name__, log_file="app.log")
+# Requests only enqueue log records; a background thread formats and writes them
+logger = get_logger(__name__, log_file="app.log", queued=True)
 
-# Load model, encoder, feature list
-try:
-    with open("model/logreg_model.pkl", "rb") as f:
-        model = pickle.load(f)
+# Fraction of requests whose full input/output is logged (LOG_PAYLOAD_SAMPLE_RATE)
+log_payload = PayloadSampler(float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0")))
+
+# "auto" serves the plain-array bundle when present; "pickle" forces the sklearn path;
+# "mmap" maps model/model_shared.bin read-only so all workers share one copy;
+# "quantized" serves the int8/float16 weights from `train_model.py --quantize`
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto")
 
-    with open("model/label_encoder.pkl", "rb") as f:
-        encoder = pickle.load(f)
+# Quantized weights whose top-1 agreement with the float64 model is lower are refused
+QUANTIZED_MIN_AGREEMENT = float(os.getenv("QUANTIZED_MIN_AGREEMENT", DEFAULT_MIN_AGREEMENT))
 
-    with open("model/feature_list.json", "r") as f:
-        feature_list = json.load(f)
+# CASCADE=1 scores the 6-dimension model first and only falls back to the
+# 48-item model when it is not confident (needs `train_model.py --dimensions`)
+CASCADE = os.getenv("CASCADE", "0") == "1"
 
+# Load model, encoder, feature list into the first snapshot
+try:
+    store = ModelStore(MODEL_FORMAT, logger=logger, min_agreement=QUANTIZED_MIN_AGREEMENT, cascade=CASCADE)
 except Exception as e:
-    logger.error(f"Failed to load model: {e}")
+    logger.error("Failed to load model: %s", e)
     raise RuntimeError("Could not load model files")
 
+# Shared secret for /admin routes; they are disabled when ADMIN_TOKEN is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Poll model/ every MODEL_WATCH_SECONDS and hot-reload changed artifacts (0 disables)
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+if MODEL_WATCH_SECONDS > 0:
+    store.watch(MODEL_WATCH_SECONDS)
+
+
+app = FastAPI(
+    title="Career Path Prediction API", version="1.0",
+    default_response_class=FastJSONResponse,
+)
 
-app = FastAPI(title="Career Path Prediction API", version="1.0")
+# Upper bound on rows accepted by /predict/batch in a single call. Bodies
+# longer than MAX_BATCH_ROW_BYTES per row are refused from Content-Length
+# before parsing; 2 KiB is ample for 48 JSON numbers at full precision.
+MAX_BATCH_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "10000"))
+MAX_BATCH_ROW_BYTES = 2048
+
+# Rows parsed and scored per step by /predict/stream
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))
+
+# Prometheus metrics served on /metrics
+metrics = Registry()
+stage_seconds = metrics.histogram(
+    "prediction_stage_seconds",
+    "Time spent in each stage of the prediction path "
+    "(parse: body decoding, build: float64 feature vector or row matrix and its checks "
+    "(binary /predict bodies are checked while decoding), cache: lookup, "
+    "inference: matrix product and softmax, microbatch: queue wait plus batched scoring, "
+    "render: label lookup and JSON encoding, log: enqueueing the log record).",
+    labelnames=("route", "stage"),
+)
+PREDICT_STAGES = {s: stage_seconds.labels("/predict", s)
+                  for s in ("parse", "build", "cache", "inference", "microbatch", "render", "log")}
+BATCH_STAGES = {s: stage_seconds.labels("/predict/batch", s)
+                for s in ("build", "inference", "render", "log")}
+
+# FAST_PATH=1 answers well-formed POST /predict calls in a raw ASGI handler
+# ahead of FastAPI routing; everything else, and any bad input, falls through.
+# Registered first so admission control and metrics still wrap it.
+if os.getenv("FAST_PATH", "0") == "1":
+    app.add_middleware(
+        FastPathMiddleware,
+        path="/predict",
+        handler=lambda content_type, body: predict_fast(content_type, body),
+        outcomes=metrics.counter("fast_path_requests_total", "POST /predict calls by fast-path outcome.",
+                                 ("outcome",)),
+    )
+
+# Admission control: at most ADMISSION_MAX_CONCURRENCY predictions run at once (0 disables),
+# up to ADMISSION_MAX_QUEUE wait ADMISSION_QUEUE_TIMEOUT_MS for a slot, the rest get 503.
+# Bulk routes get at most ADMISSION_BULK_CONCURRENCY slots and queue behind /predict.
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+admission = None
+if ADMISSION_MAX_CONCURRENCY > 0:
+    admission = AdmissionController(
+        max_concurrency=ADMISSION_MAX_CONCURRENCY,
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+        timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "1000")) / 1000,
+        bulk_concurrency=int(os.getenv("ADMISSION_BULK_CONCURRENCY", "0")) or None,
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        priorities={"/predict": INTERACTIVE, "/predict/batch": BULK, "/predict/stream": BULK},
+    )
+
+# Oversized batches are refused before they hold an admission slot or are read
+app.add_middleware(
+    BodyLimitMiddleware,
+    limits={"/predict/batch": (MAX_BATCH_ROWS * MAX_BATCH_ROW_BYTES, f"Batch exceeds {MAX_BATCH_ROWS} rows.")},
+)
+
+# Added last so it is outermost and also counts requests shed with 503
+app.add_middleware(
+    MetricsMiddleware,
+    requests=metrics.counter("http_requests_total", "Requests by method, route and status.",
+                             ("method", "route", "status")),
+    in_flight=metrics.gauge("http_requests_in_flight", "Requests currently being served."),
+    latency=metrics.histogram("http_request_duration_seconds", "End-to-end request latency.",
+                              ("route",)),
+)
 
 
 # Request schema
@@ -35,42 +146,369 @@ class UserRIASEC(BaseModel):
         ..., description="List of 48 RIASEC feature values (0–1)."
     )
 
-    def as_dataframe(self):
-        return pd.DataFrame([self.features], columns=feature_list)
+
+class UserRIASECBatch(BaseModel):
+    """Several respondents, 48 RIASEC inputs each"""
+    # Rows are validated one by one in the route, so a bad row does not fail the batch
+    features: list[Any] = Field(
+        ..., description="N rows of 48 RIASEC feature values (0–1).",
+        json_schema_extra={"items": {"type": "array", "items": {"type": "number"}}},
+    )
+
+
+# Same coercion rules the batch schema applied to each row before
+BATCH_ROW = TypeAdapter(list[float])
+
+
+def row_error(e):
+    """First pydantic error of one batch row as a short message."""
+    error = e.errors(include_url=False)[0]
+    where = ".".join(str(part) for part in error["loc"])
+    return f"{error['msg']} (value {where})" if where else error["msg"]
+
+
+def decode_body(content_type, body, n_features):
+    """
+    Decode a /predict body: the binary formats (packed float32, uint8 Likert)
+    decode straight into a validated vector, JSON into its list of features.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == FLOAT32_CONTENT_TYPE:
+        return decode_float32(body, n_features)
+    if media_type == LIKERT_CONTENT_TYPE:
+        return decode_likert(body, n_features)
+    return parse_json_body(body).features
+
+
+def parse_json_body(body):
+    """
+    JSON body -> UserRIASEC. Malformed JSON and an empty body get the same
+    422 errors FastAPI's own body parsing gives; schema errors raise ValidationError.
+    """
+    try:
+        data = loads(body) if body else None
+    except ValueError:
+        # The standard library parser gives FastAPI's error message and position
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+                  "input": {}, "ctx": {"error": e.msg}}],
+                body=body,
+            )
+    if data is None:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    return UserRIASEC.model_validate(data)
+
+
+def build_vector(features, n_features):
+    """Decoded features -> validated float64 vector (binary bodies already are one)."""
+    if isinstance(features, np.ndarray):
+        return features
+    return validate_features(np.asarray(features, dtype=np.float64), n_features)
+
+
+def render_batch(x, snapshot):
+    """Micro-batcher callback: one (response body, model version) pair per row, scored by the pinned snapshot."""
+    return [(content, snapshot.version) for content in snapshot.render_rows(x)]
+
+
+# Opt-in micro-batching of concurrent /predict calls (MICROBATCH=1)
+batcher = None
+if os.getenv("MICROBATCH", "0") == "1":
+    batcher = MicroBatcher(
+        render_batch,
+        max_batch_size=int(os.getenv("MICROBATCH_MAX_SIZE", "64")),
+        window_ms=float(os.getenv("MICROBATCH_WINDOW_MS", "2")),
+    )
+
+
+# In-process LRU cache of encoded /predict responses (RESULT_CACHE_SIZE=0 disables)
+result_cache = ResultCache(capacity=int(os.getenv("RESULT_CACHE_SIZE", "4096")))
+result_cache.bind(store.current.version)
+store.on_swap.append(lambda snapshot: result_cache.bind(snapshot.version))
+
+
+def collect_runtime_metrics():
+    model = store.stats()
+    yield "model_info", "gauge", "Active model version.", {
+        (("version", model["version"]), ("source", model["source"])): 1,
+    }
+    yield "model_reloads_total", "counter", "Model reloads by outcome.", {
+        (("outcome", "success"),): model["reloads"],
+        (("outcome", "failure"),): model["failed_reloads"],
+    }
+
+    if model["cascade"] is not None:
+        yield "cascade_rows_total", "counter", "Rows answered by each cascade tier.", {
+            (("tier", tier),): rows for tier, rows in model["cascade"]["rows"].items()
+        }
+
+    if admission is not None:
+        yield "admission_queue_depth", "gauge", "Requests waiting for an admission slot.", {
+            (("priority", name),): admission.queued[p] for p, name in PRIORITY_NAMES.items()
+        }
+        yield "admission_active", "gauge", "Requests holding an admission slot.", {
+            (("priority", name),): admission.active[p] for p, name in PRIORITY_NAMES.items()
+        }
+        yield "admission_shed_total", "counter", "Requests rejected with 503 by admission control.", {
+            (("priority", PRIORITY_NAMES[p]), ("reason", reason)): n for (p, reason), n in admission.shed.items()
+        }
+
+    cache = result_cache.stats()
+    yield "result_cache_events_total", "counter", "Result cache lookups and evictions.", {
+        (("event", "hit"),): cache["hits"],
+        (("event", "miss"),): cache["misses"],
+        (("event", "eviction"),): cache["evictions"],
+    }
+    yield "result_cache_entries", "gauge", "Entries held in the result cache.", {(): cache["size"]}
+
+    if batcher is not None:
+        batching = batcher.stats()
+        yield "microbatch_batches_total", "counter", "Batches flushed by the micro-batcher.", {
+            (): batching["batches"],
+        }
+        yield "microbatch_requests_total", "counter", "Requests scored through the micro-batcher.", {
+            (): batching["requests"],
+        }
+
+
+metrics.add_collector(collect_runtime_metrics)
 
 
 # Routes
 @app.get("/")
 def root():
-    return {"message": "Career Path Prediction API is running!"}
+    return {"message": "Career Path Prediction API is running!", "model_version": store.current.version}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "admission": admission.stats() if admission is not None else None,
+        "batching": batcher.stats() if batcher is not None else None,
+        "cache": result_cache.stats(),
+        "model": store.stats(),
+        "model_format": MODEL_FORMAT,
+        "memory": process_memory(),
+    }
+
+
+PREDICT_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": UserRIASEC.model_json_schema()},
+        FLOAT32_CONTENT_TYPE: {
+            "schema": {"type": "string", "format": "binary"},
+            "description": "48 little-endian float32 values (0–1), 192 bytes.",
+        },
+        LIKERT_CONTENT_TYPE: {
+            "schema": {"type": "string", "format": "binary"},
+            "description": "48 uint8 raw Likert answers (1–5), 48 bytes.",
+        },
+    },
+}
+
 
+@app.post("/admin/reload")
+def reload_model(x_admin_token: str | None = Header(default=None)):
+    # Constant-time comparison; bytes, since compare_digest refuses non-ASCII str
+    if not ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required.")
 
-@app.post("/predict")
-def predict_major(data: UserRIASEC):
+    previous = store.current.version
     try:
-        x = data.as_dataframe()
-
-        # Prediction
-        pred = model.predict(x)[0]
-        pred_label = encoder.inverse_transform([pred])[0]
-
-        # Top-5 classes
-        probas = model.predict_proba(x)[0]
-        top5_idx = np.argsort(probas)[-5:][::-1]
-        top5_labels = encoder.inverse_transform(top5_idx).tolist()
-        top5_probs = probas[top5_idx].round(3).tolist()
-
-        response = {
-            "predicted_major": pred_label,
-            "top_5_predictions": [
-                {"major": m, "probability": p}
-                for m, p in zip(top5_labels, top5_probs)
-            ]
-        }
+        snapshot = store.reload()
+    except Exception as e:
+        # The cause (exception text, file paths) stays in the server log
+        logger.exception("Model reload failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving {previous}")
+
+    logger.info("Model reloaded | version=%s | previous=%s", snapshot.version, previous)
+    return {"model_version": snapshot.version, "previous_version": previous, "source": snapshot.source}
+
+
+async def score_features(snapshot, x, timer):
+    """Cache lookup, inference (or micro-batch) and logging for one vector -> (body, model version)."""
+    version = snapshot.version
+
+    # Repeated answer patterns are served from the cache
+    key = quantize_key(x)
+    content = result_cache.get(key, version=version)
+    timer.mark("cache")
+
+    # Prediction + top-5 classes
+    if content is None:
+        if batcher is not None:
+            content, version = await batcher.submit(x, snapshot)
+            timer.mark("microbatch")
+        else:
+            pred, top5_idx, probas, tier = snapshot.predict(x, k=5)
+            timer.mark("inference")
+            content = snapshot.labels.render(
+                int(pred), top5_idx.tolist(), probas[top5_idx].round(3).tolist(), tier,
+            )
+            timer.mark("render")
+        result_cache.put(key, content, version=version)
+
+    if log_payload():
+        logger.info(
+            "Prediction success | model=%s | Input=%s | Output=%s",
+            version, LazyStr(x.tolist), LazyStr(content.decode),
+        )
+    else:
+        logger.info("Prediction success | model=%s", version)
+    timer.mark("log")
+    return content, version
+
+
+@app.post("/predict", openapi_extra={"requestBody": PREDICT_REQUEST_BODY})
+async def predict_major(request: Request):
+    # Pin the model for the whole request; a reload mid-request does not affect it
+    snapshot = store.current
+    timer = StageTimer(PREDICT_STAGES)
+
+    body = await request.body()
+    try:
+        n_features = snapshot.engine.n_features
+        features = decode_body(request.headers.get("content-type", ""), body, n_features)
+        timer.mark("parse")
+        x = build_vector(features, n_features)
+        timer.mark("build")
+    except ValidationError as e:
+        # Located under "body", as FastAPI reports errors in a body model
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+    except ValueError as e:
+        logger.error("Prediction error: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
 
-        logger.info(f"Prediction success | Input={data.features} | Output={response}")
-        return response
+    try:
+        content, version = await score_features(snapshot, x, timer)
+        return Response(content=content, media_type="application/json", headers={"X-Model-Version": version})
 
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
+        logger.error("Prediction error: %s", e)
         raise HTTPException(status_code=400, detail="Invalid input format.")
+
+
+async def predict_fast(content_type, body):
+    """
+    FAST_PATH handler for /predict: well-formed requests only. Anything else
+    raises and is replayed to the route above, so errors look the same.
+    """
+    snapshot = store.current
+    n_features = snapshot.engine.n_features
+    start = time.perf_counter()
+
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == FLOAT32_CONTENT_TYPE:
+        features = decode_float32(body, n_features)
+    elif media_type == LIKERT_CONTENT_TYPE:
+        features = decode_likert(body, n_features)
+    else:
+        features = loads(body)["features"]
+        # Plain JSON numbers only; pydantic's coercions (e.g. "0.5") take the slow path
+        if type(features) is not list or not all(type(v) is float or type(v) is int for v in features):
+            raise FallThrough()
+    parsed = time.perf_counter()
+    x = build_vector(features, n_features)
+    timer = StageTimer(PREDICT_STAGES)
+
+    # Observed only once the request is known to be served here: one that
+    # falls through is parsed and built again, and timed, by the route
+    PREDICT_STAGES["parse"].observe(parsed - start)
+    PREDICT_STAGES["build"].observe(timer.last - parsed)
+    return await score_features(snapshot, x, timer)
+
+
+@app.post("/predict/batch")
+def predict_major_batch(data: UserRIASECBatch):
+    snapshot = store.current
+    timer = StageTimer(BATCH_STAGES)
+    rows = data.features
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ROWS} rows.")
+
+    n_features = snapshot.engine.n_features
+    results = [None] * len(rows)
+
+    # Per-row checks: wrong types, wrong length or out-of-range values are reported, not fatal
+    valid = []
+    for i, row in enumerate(rows):
+        try:
+            rows[i] = row = BATCH_ROW.validate_python(row)
+        except ValidationError as e:
+            results[i] = dumps({"row": i, "error": row_error(e)})
+            continue
+        if len(row) != n_features:
+            results[i] = dumps({"row": i, "error": f"Expected {n_features} features, got {len(row)}"})
+        else:
+            valid.append(i)
+
+    x = np.array([rows[i] for i in valid], dtype=np.float64).reshape(-1, n_features)
+    in_range = valid_rows(x)
+    for i in np.asarray(valid, dtype=np.intp)[~in_range].tolist():
+        results[i] = dumps({"row": i, "error": "Feature values must be within [0.0, 1.0]"})
+
+    scored = [i for i, ok in zip(valid, in_range.tolist()) if ok]
+    timer.mark("build")
+
+    # One matrix multiply + softmax over every valid row
+    if scored:
+        scores = snapshot.score_rows(x[in_range])
+        timer.mark("inference")
+        for i, *row in zip(scored, *scores):
+            results[i] = snapshot.labels.render(*row, row=i)
+
+    n_errors = len(rows) - len(scored)
+    content = (
+        b'{"n_rows":' + str(len(rows)).encode() + b',"n_errors":' + str(n_errors).encode()
+        + b',"results":[' + b",".join(results) + b"]}"
+    )
+    timer.mark("render")
+
+    logger.info("Batch prediction | model=%s | rows=%d | errors=%d", snapshot.version, len(rows), n_errors)
+    timer.mark("log")
+    return Response(content=content, media_type="application/json", headers={"X-Model-Version": snapshot.version})
+
+
+@app.post("/predict/stream")
+async def predict_major_stream(request: Request, likert: bool = False):
+    """
+    Bulk scoring for uploads of any size: a streamed CSV (header with the 48
+    feature columns) or NDJSON body is scored in fixed-size chunks and the
+    results are streamed back as NDJSON, one line per input row.
+    Set likert=true when the values are raw 1–5 answers.
+    """
+    snapshot = store.current
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    lines = iter_lines(request.stream())
+
+    if media_type in CSV_CONTENT_TYPES:
+        try:
+            columns, n_columns = csv_columns(await anext(lines), snapshot.feature_list)
+        except StopAsyncIteration:
+            raise HTTPException(status_code=400, detail="Empty upload.")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        parse = partial(parse_csv_rows, columns=columns, n_columns=n_columns)
+    elif media_type in NDJSON_CONTENT_TYPES:
+        parse = partial(parse_ndjson_rows, n_features=snapshot.engine.n_features)
+    else:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson.")
+
+    def done(rows, errors):
+        logger.info("Stream prediction | model=%s | rows=%d | errors=%d", snapshot.version, rows, errors)
+
+    return FullDuplexStreamingResponse(
+        stream_predictions(lines, parse, snapshot, STREAM_CHUNK_ROWS, likert, on_done=done),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": snapshot.version},
+    )
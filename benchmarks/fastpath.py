@@ -0,0 +1,122 @@
+# benchmarks/fastpath.py
+"""
+Per-request overhead of POST /predict through FastAPI versus the FAST_PATH
+raw ASGI handler, called directly as ASGI apps (no HTTP client or server
+in the measurement) on the same vectors.
+
+    python -m benchmarks.fastpath --requests 5000
+    python -m benchmarks.fastpath --requests 5000 --cache
+
+By default the result cache is disabled so every request runs inference;
+"inference only" is snapshot.render_one on the same vector, the floor
+either path can reach.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("LOG_PAYLOAD_SAMPLE_RATE", "0")
+
+
+def make_scope(body):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def call(asgi_app, body):
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asgi_app(make_scope(body), receive, send)
+    return status
+
+
+def summarize(latencies):
+    us = np.asarray(latencies) * 1e6
+    return {
+        "mean_us": round(float(us.mean()), 1),
+        "p50_us": round(float(np.percentile(us, 50)), 1),
+        "p99_us": round(float(np.percentile(us, 99)), 1),
+    }
+
+
+async def measure(asgi_app, bodies, n_requests):
+    for body in bodies[:50]:  # warm up
+        await call(asgi_app, body)
+    latencies = []
+    for i in range(n_requests):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        status = await call(asgi_app, body)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"Request failed with status {status}")
+    return summarize(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FastAPI vs raw ASGI fast path for POST /predict.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--unique", type=int, default=1000, help="Distinct synthetic vectors.")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import app as app_module
+    from util.fastpath import FastPathMiddleware
+
+    if not args.cache:
+        app_module.result_cache.capacity = 0
+
+    rng = np.random.default_rng(args.seed)
+    vectors = (rng.integers(1, 6, size=(args.unique, 48)) - 1) / 4
+    bodies = [json.dumps({"features": v.tolist()}).encode() for v in vectors]
+
+    snapshot = app_module.store.current
+    latencies = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        snapshot.render_one(vectors[i % len(vectors)])
+        latencies.append(time.perf_counter() - start)
+
+    fast_app = FastPathMiddleware(app_module.app, "/predict", app_module.predict_fast)
+    results = {
+        "inference only": summarize(latencies),
+        "fastapi": asyncio.run(measure(app_module.app, bodies, args.requests)),
+        "fast path": asyncio.run(measure(fast_app, bodies, args.requests)),
+    }
+    for name, r in results.items():
+        print(f"{name:<15} mean={r['mean_us']:>8.1f}us  p50={r['p50_us']:>8.1f}us  p99={r['p99_us']:>8.1f}us")
+
+    removed = results["fastapi"]["mean_us"] - results["fast path"]["mean_us"]
+    print(f"Overhead removed per request: {removed:.1f}us "
+          f"({removed / results['fastapi']['mean_us']:.0%} of the FastAPI path)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# benchmarks/load_test.py
+"""
+Latency/throughput benchmark for the prediction API.
+
+Replays synthetic or recorded RIASEC vectors against the app, in-process
+(ASGI transport, no network) or against a running server, at several
+concurrency levels. Reports p50/p95/p99 latency and requests per second,
+optionally saves the results as JSON and fails when they regress past a
+threshold against a stored baseline.
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 2000 --output bench.json
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --baseline bench.json --threshold 0.2
+    python -m benchmarks.load_test --inputs data/final_data_48.csv --route /predict/batch --batch-size 100
+
+In-process mode measures per-request overhead of the app itself; requests
+rarely interleave there, so use --url against uvicorn (with --workers) to
+see queueing and tail latency under real concurrency.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+N_FEATURES = 48
+
+
+def synthetic_inputs(n_unique, seed=0):
+    """Vectors on the 1–5 Likert grid, normalized the way the UI sends them."""
+    rng = np.random.default_rng(seed)
+    answers = rng.integers(1, 6, size=(n_unique, N_FEATURES))
+    return ((answers - 1) / 4).tolist()
+
+
+def recorded_inputs(path, limit=None):
+    """
+    Feature rows from a JSON-lines file ({"features": [...]} per line) or from a
+    CSV with the 48 item columns, e.g. data/final_data_48.csv.
+    """
+    rows = []
+    with open(path, newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line)["features"])
+                if limit and len(rows) >= limit:
+                    break
+        else:
+            reader = csv.DictReader(f)
+            items = [c for c in reader.fieldnames if c[:1] in "RIASEC" and c[1:].isdigit()]
+            for record in reader:
+                rows.append([float(record[c]) for c in items])
+                if limit and len(rows) >= limit:
+                    break
+    return rows
+
+
+def percentile_summary(latencies, elapsed, errors):
+    lat_ms = np.asarray(latencies) * 1000
+    done = len(latencies)
+    return {
+        "requests": done,
+        "errors": errors,
+        "rps": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(float(lat_ms.mean()), 3) if done else None,
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 3) if done else None,
+        "p95_ms": round(float(np.percentile(lat_ms, 95)), 3) if done else None,
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 3) if done else None,
+    }
+
+
+async def run_level(client, route, payloads, concurrency, n_requests):
+    """Fire n_requests from `concurrency` closed-loop workers, cycling through payloads."""
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < n_requests:
+            payload = payloads[next_index % len(payloads)]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                resp = await client.post(route, json=payload)
+                ok = resp.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return percentile_summary(latencies, time.perf_counter() - start, errors)
+
+
+def make_payloads(rows, route, batch_size):
+    if route == "/predict/batch":
+        return [{"features": rows[i:i + batch_size]} for i in range(0, len(rows), batch_size)]
+    return [{"features": row} for row in rows]
+
+
+async def run(args, rows):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        from app import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    payloads = make_payloads(rows, args.route, args.batch_size)
+    levels = []
+    async with client:
+        await run_level(client, args.route, payloads, 1, args.warmup)
+        for concurrency in args.concurrency:
+            result = await run_level(client, args.route, payloads, concurrency, args.requests)
+            result["concurrency"] = concurrency
+            levels.append(result)
+            print(
+                f"c={concurrency:<4} rps={result['rps']:>9.1f}  p50={result['p50_ms']:>8.3f}ms  "
+                f"p95={result['p95_ms']:>8.3f}ms  p99={result['p99_ms']:>8.3f}ms  errors={result['errors']}"
+            )
+    return levels
+
+
+def compare(levels, baseline, threshold):
+    """Regression messages for levels whose p95/p99 grew or rps fell by more than threshold."""
+    base_by_c = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    problems = []
+    for level in levels:
+        base = base_by_c.get(level["concurrency"])
+        if base is None:
+            continue
+        c = level["concurrency"]
+        for key in ("p95_ms", "p99_ms"):
+            if base.get(key) and level[key] > base[key] * (1 + threshold):
+                problems.append(f"c={c}: {key} {level[key]} > baseline {base[key]} (+{threshold:.0%})")
+        if base.get("rps") and level["rps"] < base["rps"] * (1 - threshold):
+            problems.append(f"c={c}: rps {level['rps']} < baseline {base['rps']} (-{threshold:.0%})")
+        if level["errors"] > base.get("errors", 0):
+            problems.append(f"c={c}: {level['errors']} errors (baseline {base.get('errors', 0)})")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the prediction API.")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app.")
+    parser.add_argument("--route", default="/predict", choices=["/predict", "/predict/batch"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level.")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--inputs", help="Recorded vectors (.jsonl or CSV); synthetic when omitted.")
+    parser.add_argument("--unique", type=int, default=1000, help="Distinct synthetic vectors.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per /predict/batch call.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here.")
+    parser.add_argument("--baseline", help="Compare against this results JSON.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression.")
+    args = parser.parse_args(argv)
+
+    rows = recorded_inputs(args.inputs) if args.inputs else synthetic_inputs(args.unique, args.seed)
+    levels = asyncio.run(run(args, rows))
+
+    results = {
+        "meta": {
+            "target": args.url or "in-process",
+            "route": args.route,
+            "inputs": args.inputs or f"synthetic:{args.unique}:seed={args.seed}",
+            "requests_per_level": args.requests,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "env": {k: v for k, v in os.environ.items()
+                    if k.startswith(("MICROBATCH", "MODEL_FORMAT", "RESULT_CACHE", "LOG_PAYLOAD"))},
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "levels": levels,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(levels, json.load(f), args.threshold)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# benchmarks/memory.py
+"""
+Per-worker memory report: start N API processes with the same MODEL_FORMAT,
+keep them alive together, and compare shared versus private resident memory.
+
+    python -m benchmarks.memory --workers 4 --format mmap
+    python -m benchmarks.memory --workers 4 --format auto
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in each child: load the app, score once, wait until every sibling is up
+WORKER = """
+import json, sys
+import numpy as np
+import app
+from util.artifacts import SHARED_PATH
+from util.memory import process_memory, mapping_memory
+engine = app.store.current.engine
+engine.predict(np.zeros(engine.n_features))
+print("ready", flush=True)
+sys.stdin.readline()
+print(json.dumps({
+    "process": process_memory(),
+    "model_file_kb": mapping_memory(SHARED_PATH) if app.MODEL_FORMAT == "mmap" else None,
+}), flush=True)
+"""
+
+
+def run(n_workers, model_format):
+    env = dict(os.environ, MODEL_FORMAT=model_format)
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER], env=env, text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        assert p.stdout.readline().strip() == "ready"
+
+    reports = []
+    for p in procs:
+        p.stdin.write("report\n")
+        p.stdin.flush()
+        reports.append(json.loads(p.stdout.readline()))
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker RSS across model formats.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--format", default="mmap", choices=["auto", "pickle", "mmap"])
+    parser.add_argument("--output", help="Optional path for the JSON report.")
+    args = parser.parse_args()
+
+    reports = run(args.workers, args.format)
+
+    print(f"MODEL_FORMAT={args.format}, {args.workers} workers")
+    print(f"{'worker':<7} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10} {'private MB':>11}  model file (kB)")
+    for i, r in enumerate(reports):
+        m = r["process"] or {}
+        f = r["model_file_kb"]
+        mapped = "-"
+        if f:
+            shared, private = f["Shared_Clean"] + f["Shared_Dirty"], f["Private_Clean"] + f["Private_Dirty"]
+            mapped = f"rss={f['Rss']} shared={shared} private={private}"
+        print(f"{i:<7} {m.get('rss_mb', 0):>8.1f} {m.get('pss_mb', 0):>8.1f} "
+              f"{m.get('shared_mb', 0):>10.1f} {m.get('private_mb', 0):>11.1f}  {mapped}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"format": args.format, "workers": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/startup.py
+"""
+Cold-start benchmark: import + model load time for the plain-array bundle
+versus the pickle fallback, each measured in a fresh interpreter.
+
+    python -m benchmarks.startup --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a child process; prints one JSON line
+SNIPPET = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+from util import artifacts
+t1 = time.perf_counter()
+if {use_bundle}:
+    artifacts.load_bundle()
+else:
+    artifacts.load_pickle_artifacts()
+t2 = time.perf_counter()
+import app
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import_s": t1 - t0,
+    "load_s": t2 - t1,
+    "app_import_s": t3 - t2,
+    "total_s": t3 - t0,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "sklearn_loaded": "sklearn" in sys.modules,
+    "pandas_loaded": "pandas" in sys.modules,
+}}))
+"""
+
+
+def measure(use_bundle, repeats):
+    env = dict(os.environ, MODEL_FORMAT="auto" if use_bundle else "pickle")
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(use_bundle=use_bundle)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    summary = {k: round(statistics.median(r[k] for r in runs), 4)
+               for k in ("import_s", "load_s", "app_import_s", "total_s", "max_rss_mb")}
+    summary["sklearn_loaded"] = runs[0]["sklearn_loaded"]
+    summary["pandas_loaded"] = runs[0]["pandas_loaded"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start time per artifact format.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Optional path for the JSON report.")
+    args = parser.parse_args()
+
+    report = {"bundle": measure(True, args.repeats), "pickle": measure(False, args.repeats)}
+
+    print(f"{'path':<8} {'load s':>8} {'total s':>8} {'rss MB':>8}  sklearn  pandas")
+    for name, r in report.items():
+        print(f"{name:<8} {r['load_s']:>8.3f} {r['total_s']:>8.3f} {r['max_rss_mb']:>8.1f}"
+              f"  {str(r['sklearn_loaded']):<7}  {r['pandas_loaded']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,36 @@
 # prepare_data.py
 import os
+import numpy as np
 import pandas as pd
-from rapidfuzz import process, fuzz
+from util.dataset import save_prepared
 from util.logger import get_logger
-from util.major_mapping import major_mapping
-from util.categories_list import standardized_categories
+from util.majors import MAJOR_DTYPES, clean_majors, resolve_majors
+from util.validation import normalize_likert
 
 logger = get_logger(__name__, log_file="prepare_data.log")
 
+DIMENSIONS = "RIASEC"
 
-def run_prepare_data(input_path="data/data.csv", output_path="data/final_data.csv", test_mode=False):
+
+def dimension_means(items):
+    """
+    Normalized item answers -> R_pct..C_pct, the mean of each dimension's items.
+    With the same number of items per dimension (the full survey has 8) this
+    is one reshaped (N, 6, 8) reduction.
+    """
+    groups = {d: [c for c in items.columns if c[0] == d] for d in DIMENSIONS}
+    groups = {d: cols for d, cols in groups.items() if cols}
+    sizes = {len(cols) for cols in groups.values()}
+
+    if len(sizes) == 1:
+        x = items[[c for cols in groups.values() for c in cols]].to_numpy(dtype=np.float64)
+        means = x.reshape(len(x), len(groups), sizes.pop()).mean(axis=2)
+    else:
+        means = np.column_stack([items[cols].to_numpy(dtype=np.float64).mean(axis=1) for cols in groups.values()])
+    return pd.DataFrame(means, columns=[f"{d}_pct" for d in groups], index=items.index)
+
+
+def run_prepare_data(input_path="data/data.csv", output_path="data/final_data.npz", test_mode=False):
     """
     Full data cleaning pipeline.
     Returns final cleaned dataframe.
@@ -17,8 +38,8 @@ def run_prepare_data(input_path="data/data.csv", output_path="data/final_data.cs
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    # 1. Load data
-    df = pd.read_csv(input_path, sep="\t")
+    # 1. Load data (majors as categoricals)
+    df = pd.read_csv(input_path, sep="\t", dtype=MAJOR_DTYPES)
     logger.info(f"Loaded dataset: {df.shape}")
 
     # 2. Remove duplicate raw rows
@@ -47,33 +68,14 @@ def run_prepare_data(input_path="data/data.csv", output_path="data/final_data.cs
     logger.info(f"After dropping missing: {df.shape}")
 
     # 5. Compute percentages (1–5 → 0–1)
-    for key, cols in riasec_columns.items():
-        cols = [c for c in cols if c in df.columns]
-        if cols:
-            df[key + "_pct"] = (df[cols].mean(axis=1) - 1) / 4
-
-    df = df[[c for c in df.columns if c.endswith("_pct")] + ["major"]]
+    items = [c for c in existing_cols if c != "major"]
+    df = pd.concat([dimension_means(normalize_likert(df[items])), df[["major"]]], axis=1)
 
     # 6. Clean major
-    df["major"] = (
-        df["major"]
-        .astype(str)
-        .str.lower()
-        .str.replace(r"[^a-z ]", "", regex=True)
-        .str.strip()
-    )
-
-    # 7. Dictionary mapping
-    df["major_standard"] = df["major"].map(major_mapping).fillna(df["major"])
-
-    # 8. Fuzzy matching
-    if not test_mode:
-        def fuzzy_match(x):
-            match, score, _ = process.extractOne(x, standardized_categories, scorer=fuzz.WRatio)
-            return match if score >= 70 else "Other"
+    df["major"] = clean_majors(df["major"])
 
-        unmatched = df["major_standard"] == df["major"]
-        df.loc[unmatched, "major_standard"] = df.loc[unmatched, "major"].apply(fuzzy_match)
+    # 7–8. Dictionary mapping + fuzzy matching, cached in data/major_resolutions.json
+    df["major_standard"] = resolve_majors(df["major"], logger, fuzzy=not test_mode)
 
     # 9. Remove "Other" + rare classes
     if not test_mode:
@@ -84,8 +86,8 @@ def run_prepare_data(input_path="data/data.csv", output_path="data/final_data.cs
     # 10. Final cleanup
     df = df.drop_duplicates()
 
-    # 11. Save result
-    df.to_csv(output_path, index=False)
+    # 11. Save result (.npz columnar, anything else CSV)
+    save_prepared(df, output_path, [c for c in df.columns if c.endswith("_pct")])
     logger.info(f"Saved cleaned dataset to: {output_path}")
 
     return df
@@ -1,52 +1,149 @@
 # prepare_data_48.py
+import argparse
 import os
+from collections import Counter
+
 import pandas as pd
-from rapidfuzz import process, fuzz
+from util.dataset import PreparedWriter, likert_codes, prepared_format, save_prepared
+from util.dedupe import RowHashSet
 from util.logger import get_logger
-from util.major_mapping import major_mapping
-from util.categories_list import standardized_categories
+from util.majors import MAJOR_DTYPES, clean_majors, resolve_majors
+from util.validation import normalize_likert
 
 logger = get_logger(__name__, "prepare_data_48.log")
 
+RIASEC_ITEMS = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
 
-def run_prepare_data_48(input_path="data/data.csv", output_path="data/final_data_48.csv", test_mode=False):
-    df = pd.read_csv(input_path, sep="\t")
-    df = df.drop_duplicates()
 
-    riasec_items = [f"{c}{i}" for c in "RIASEC" for i in range(1,9)]
-    existing = [c for c in riasec_items + ["major"] if c in df.columns]
+def clean_rows(df, test_mode=False):
+    """Deduplicated raw rows -> normalized items, cleaned and standardized major."""
+    existing = [c for c in RIASEC_ITEMS + ["major"] if c in df.columns]
     df = df[existing].dropna()
 
-    present_items = [c for c in riasec_items if c in df.columns]
-    df[present_items] = (df[present_items] - 1) / 4
+    present_items = [c for c in RIASEC_ITEMS if c in df.columns]
+    df[present_items] = normalize_likert(df[present_items])
 
-    df["major"] = (
-        df["major"].astype(str)
-        .str.lower()
-        .str.replace(r"[^a-z ]", "", regex=True)
-        .str.strip()
-    )
+    df["major"] = clean_majors(df["major"])
     df = df[df["major"] != ""]
 
-    df["major_standard"] = df["major"].map(major_mapping).fillna(df["major"])
-    unchanged = df[df["major_standard"] == df["major"]]
+    df["major_standard"] = resolve_majors(df["major"], logger, fuzzy=not test_mode)
 
     if not test_mode:
-        def fuzz_match(x):
-            match, score, _ = process.extractOne(x, standardized_categories, scorer=fuzz.WRatio)
-            return match if score >= 70 else "Other"
-        df.loc[unchanged.index, "major_standard"] = unchanged["major"].apply(fuzz_match)
+        df = df[df["major_standard"] != "Other"]
+    return df
+
+
+def run_prepare_data_48(input_path="data/data.csv", output_path="data/final_data_48.npz", test_mode=False,
+                        chunksize=None):
+    """
+    Full data cleaning pipeline; returns the cleaned dataframe.
+    A .npz output_path is written columnar and compactly typed (see
+    util/dataset.py), anything else as CSV. With chunksize, streams the
+    input instead (see stream_prepare_data_48).
+    """
+    if chunksize:
+        return stream_prepare_data_48(input_path, output_path, test_mode, chunksize)
+
+    df = pd.read_csv(input_path, sep="\t", dtype=MAJOR_DTYPES)
+    df = df.drop_duplicates()
+
+    df = clean_rows(df, test_mode)
 
     if not test_mode:
-        df = df[df["major_standard"] != "Other"]
         vc = df["major_standard"].value_counts()
         df = df[df["major_standard"].isin(vc[vc > 2].index)]
 
     df = df.drop_duplicates()
-    df.to_csv(output_path, index=False)
+    save_prepared(df, output_path, [c for c in RIASEC_ITEMS if c in df.columns])
     return df
 
 
+def stream_prepare_data_48(input_path="data/data.csv", output_path="data/final_data_48.npz", test_mode=False,
+                           chunksize=100_000):
+    """
+    Same output as the in-memory pipeline with memory bounded by chunksize.
+    Pass 1 cleans each chunk, drops rows already seen in earlier chunks
+    (by 64-bit row hash), counts labels and appends to a temporary file.
+    Pass 2 copies that file to the output, dropping classes with 2 rows or
+    fewer. Returns row counts rather than the dataframe.
+    """
+    tmp_path = f"{output_path}.pass1"
+    raw_seen, clean_seen = RowHashSet(), RowHashSet()
+    label_counts, kept_counts = Counter(), Counter()
+    major_pairs = set()
+    feature_cols, likert = None, True
+    stats = {"rows_read": 0, "rows_written": 0}
+
+    header = True
+    for chunk in pd.read_csv(input_path, sep="\t", dtype=MAJOR_DTYPES, chunksize=chunksize):
+        stats["rows_read"] += len(chunk)
+        df = clean_rows(chunk[raw_seen.first_seen(chunk)], test_mode)
+        # Rare classes are counted before the final dedupe, as in the in-memory pipeline
+        counts = df["major_standard"].value_counts()
+        label_counts.update(counts[counts > 0].to_dict())
+        df = df[clean_seen.first_seen(df)]
+
+        # Sizes and dictionaries of the columnar output
+        feature_cols = [c for c in RIASEC_ITEMS if c in df.columns]
+        counts = df["major_standard"].value_counts()
+        kept_counts.update(counts[counts > 0].to_dict())
+        major_pairs.update(df[["major", "major_standard"]].drop_duplicates().itertuples(index=False, name=None))
+        likert = likert and likert_codes(df[feature_cols].to_numpy()) is not None
+
+        df.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+    if header:  # empty input: nothing to stream
+        raise ValueError(f"No rows in {input_path}")
+
+    keep = set(label_counts) if test_mode else {label for label, n in label_counts.items() if n > 2}
+    columnar = prepared_format(output_path) == "npz"
+    if columnar:
+        writer = PreparedWriter(
+            output_path, sum(kept_counts[label] for label in keep), feature_cols, sorted(keep),
+            sorted({major for major, label in major_pairs if label in keep}), likert,
+        )
+        # Majors such as "nan" or "null" must stay strings
+        reader = pd.read_csv(tmp_path, dtype=MAJOR_DTYPES, keep_default_na=False, chunksize=chunksize)
+    else:
+        # Read back as text so values are copied through unchanged
+        reader = pd.read_csv(tmp_path, dtype=str, keep_default_na=False, chunksize=chunksize)
+
+    header = True
+    for df in reader:
+        df = df[df["major_standard"].isin(keep)]
+        stats["rows_written"] += len(df)
+        if columnar:
+            writer.write(df)
+        else:
+            df.to_csv(output_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+    if columnar:
+        writer.close()
+    elif header:  # nothing but the header row survived pass 1
+        pd.read_csv(tmp_path, nrows=0).to_csv(output_path, index=False)
+    os.remove(tmp_path)
+
+    stats.update(raw_duplicates=stats["rows_read"] - len(raw_seen), classes=len(keep))
+    logger.info(
+        f"Streamed {stats['rows_read']} rows in chunks of {chunksize}: "
+        f"{stats['raw_duplicates']} duplicates, {stats['rows_written']} rows written to {output_path}"
+    )
+    return stats
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare the 48-item training dataset.")
+    parser.add_argument("--input", default="data/data.csv")
+    parser.add_argument(
+        "--output", default="data/final_data_48.npz",
+        help="A .npz path is written columnar with compact dtypes; any other path as CSV.",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Stream the input in chunks of this many rows; memory no longer grows with the dataset.",
+    )
+    args = parser.parse_args()
+
     os.makedirs("data", exist_ok=True)
-    run_prepare_data_48()
+    run_prepare_data_48(args.input, args.output, chunksize=args.chunksize)
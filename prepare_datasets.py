@@ -0,0 +1,56 @@
+# prepare_datasets.py
+import argparse
+import os
+
+import pandas as pd
+from prepare_data import dimension_means
+from prepare_data_48 import RIASEC_ITEMS, clean_rows
+from util.dataset import save_prepared
+from util.logger import get_logger
+from util.majors import MAJOR_DTYPES
+
+logger = get_logger(__name__, log_file="prepare_datasets.log")
+
+
+def run_prepare_datasets(input_path="data/data.csv", items_path="data/final_data_48.npz",
+                         dimensions_path="data/final_data.npz", test_mode=False):
+    """
+    Both training datasets from one read of the raw data: the 48 normalized
+    items (prepare_data_48.py) and the six dimension means (prepare_data.py).
+    Deduplication, major cleaning and resolution run once and are shared.
+    Returns (items dataframe, dimensions dataframe).
+    """
+    os.makedirs(os.path.dirname(items_path) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(dimensions_path) or ".", exist_ok=True)
+
+    df = pd.read_csv(input_path, sep="\t", dtype=MAJOR_DTYPES)
+    logger.info(f"Loaded dataset: {df.shape}")
+    df = clean_rows(df.drop_duplicates(), test_mode)
+
+    if not test_mode:
+        vc = df["major_standard"].value_counts()
+        df = df[df["major_standard"].isin(vc[vc > 2].index)]
+
+    item_cols = [c for c in RIASEC_ITEMS if c in df.columns]
+    dimensions = pd.concat([dimension_means(df[item_cols]), df[["major", "major_standard"]]], axis=1)
+
+    # Each dataset drops the rows that are duplicates in its own columns
+    items = df.drop_duplicates()
+    dimensions = dimensions.drop_duplicates()
+
+    save_prepared(items, items_path, item_cols)
+    save_prepared(dimensions, dimensions_path, [c for c in dimensions.columns if c.endswith("_pct")])
+    logger.info(
+        f"Saved {len(items)} rows to {items_path} and {len(dimensions)} rows to {dimensions_path}"
+    )
+    return items, dimensions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare the 48-item and 6-dimension training datasets in one pass.")
+    parser.add_argument("--input", default="data/data.csv")
+    parser.add_argument("--items-output", default="data/final_data_48.npz")
+    parser.add_argument("--dimensions-output", default="data/final_data.npz")
+    args = parser.parse_args()
+
+    run_prepare_datasets(args.input, args.items_output, args.dimensions_output)
@@ -0,0 +1,273 @@
+# score_file.py
+"""
+Offline bulk scoring of a CSV/TSV file of RIASEC answers.
+
+    python score_file.py data/data.csv scores.parquet --workers 4
+    python score_file.py export.csv scores.parquet --scale normalized --id-column respondent_id
+
+The input is read in chunks and scored across a process pool, each worker
+loading the model from model/ once. Every finished chunk is written as its
+own part file and recorded in a checkpoint, so re-running the same command
+after an interruption only scores the chunks that are missing. The parts
+are merged into the output once all chunks are done.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+from util.logger import get_logger
+from util.model_store import load_snapshot
+from util.validation import FEATURE_RANGE, LIKERT_RANGE, normalize_likert, valid_rows
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV output is used without it
+    pq = None
+
+logger = get_logger(__name__, log_file="score_file.log")
+
+CHECKPOINT_FILE = "checkpoint.json"
+TOP_K = 5
+
+# Set in each worker by init_worker
+_snapshot = None
+
+
+def part_format():
+    return "parquet" if pq is not None else "csv"
+
+
+def sniff_separator(path):
+    """data/data.csv is tab-separated; exports are usually comma-separated."""
+    with open(path, newline="") as f:
+        header = f.readline()
+    return "\t" if header.count("\t") > header.count(",") else ","
+
+
+def input_signature(path, chunk_rows, scale, version):
+    """Identifies a run; a checkpoint written for a different one is not resumed."""
+    stat = os.stat(path)
+    return {
+        "input": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "chunk_rows": chunk_rows,
+        "scale": scale,
+        "model_version": version,
+        "format": part_format(),
+    }
+
+
+def load_checkpoint(parts_dir, signature):
+    path = os.path.join(parts_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("signature") != signature:
+        logger.warning(f"Checkpoint in {parts_dir} belongs to another run, starting over")
+        return {}
+    return {int(k): v for k, v in checkpoint["done"].items()}
+
+
+def save_checkpoint(parts_dir, signature, done):
+    path = os.path.join(parts_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"signature": signature, "done": done}, f)
+    os.replace(path + ".tmp", path)
+
+
+def part_path(parts_dir, index):
+    return os.path.join(parts_dir, f"part-{index:06d}.{part_format()}")
+
+
+def init_worker(model_format, cascade=False):
+    global _snapshot
+    _snapshot = load_snapshot(model_format, cascade=cascade)
+
+
+def score_frame(snapshot, x, scale):
+    """
+    Score an (n, 48) matrix -> columnar result frame. Rows with missing or
+    out-of-range answers keep their place with an error and no prediction.
+    """
+    low, high = LIKERT_RANGE if scale == "raw" else FEATURE_RANGE
+    ok = valid_rows(x, low, high)
+    if scale == "raw":
+        x = normalize_likert(x)
+
+    n = len(x)
+    names = np.array(snapshot.labels.names, dtype=object)
+    columns = {"predicted_major": np.full(n, None, dtype=object)}
+    for k in range(1, TOP_K + 1):
+        columns[f"top{k}_major"] = np.full(n, None, dtype=object)
+        columns[f"top{k}_probability"] = np.full(n, np.nan)
+
+    if snapshot.cascade is not None:
+        columns["tier"] = np.full(n, None, dtype=object)
+
+    if ok.any():
+        preds, top_idx, probas, tiers = snapshot.predict(x[ok], k=TOP_K)
+        if tiers is not None:
+            columns["tier"][ok] = tiers
+        top_probs = np.take_along_axis(probas, top_idx, axis=1).round(3)
+        columns["predicted_major"][ok] = names[preds]
+        for k in range(TOP_K):
+            columns[f"top{k + 1}_major"][ok] = names[top_idx[:, k]]
+            columns[f"top{k + 1}_probability"][ok] = top_probs[:, k]
+
+    columns["error"] = np.where(ok, None, f"Missing or out-of-range answers (expected {low}–{high})")
+    # Nullable string columns keep one schema across parts, even all-error chunks
+    text = [name for name, values in columns.items() if values.dtype == object]
+    return pd.DataFrame(columns).astype({name: "string" for name in text})
+
+
+def score_chunk(index, first_row, x, ids, scale, parts_dir):
+    """Worker task: score one chunk and write its part file. Returns (index, rows, errors)."""
+    result = score_frame(_snapshot, x, scale)
+    result.insert(0, "row", np.arange(first_row, first_row + len(x)))
+    if ids is not None:
+        result.insert(1, "id", ids)
+
+    path = part_path(parts_dir, index)
+    if part_format() == "parquet":
+        result.to_parquet(path + ".tmp", index=False, engine="pyarrow")
+    else:
+        result.to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return index, len(result), int(result["error"].notna().sum())
+
+
+def iter_chunks(path, feature_list, chunk_rows, id_column=None):
+    """(index, first_row, feature matrix, ids or None) per chunk of the input."""
+    usecols = list(feature_list) + ([id_column] if id_column else [])
+    reader = pd.read_csv(path, sep=sniff_separator(path), usecols=usecols, chunksize=chunk_rows)
+    first_row = 0
+    for index, df in enumerate(reader):
+        x = df[list(feature_list)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        ids = df[id_column].to_numpy() if id_column else None
+        yield index, first_row, x, ids
+        first_row += len(df)
+
+
+def merge_parts(parts_dir, indices, output_path):
+    """Concatenate part files in chunk order into the final output, one part in memory at a time."""
+    tmp_path = output_path + ".tmp"
+    if part_format() == "parquet":
+        writer = None
+        for index in indices:
+            table = pq.read_table(part_path(parts_dir, index))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        if writer is not None:
+            writer.close()
+    else:
+        with open(tmp_path, "wb") as out:
+            for n, index in enumerate(indices):
+                with open(part_path(parts_dir, index), "rb") as part:
+                    if n:
+                        part.readline()  # header already written
+                    shutil.copyfileobj(part, out)
+    os.replace(tmp_path, output_path)
+
+
+def read_scores(path):
+    """Load an output written by score_file(), whichever format it was written in."""
+    if part_format() == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype={"predicted_major": "string", "error": "string"})
+
+
+def score_file(input_path, output_path, workers=None, chunk_rows=50_000, scale="raw",
+               id_column=None, model_format="auto", keep_parts=False, cascade=False):
+    """Score input_path into output_path, resuming from checkpoints in <output>.parts/."""
+    if pq is None and output_path.endswith(".parquet"):
+        logger.warning("pyarrow is not installed; writing CSV despite the .parquet extension")
+    snapshot = load_snapshot(model_format, cascade=cascade)
+    feature_list = snapshot.feature_list
+    parts_dir = output_path + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+
+    signature = input_signature(input_path, chunk_rows, scale, snapshot.version)
+    done = load_checkpoint(parts_dir, signature)
+    if done:
+        logger.info(f"Resuming: {len(done)} chunks already scored")
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    scored_rows = 0
+    n_errors = 0
+
+    def record(result):
+        nonlocal scored_rows, n_errors
+        index, rows, errors = result
+        done[index] = rows
+        save_checkpoint(parts_dir, signature, done)
+        scored_rows += rows
+        n_errors += errors
+        elapsed = time.perf_counter() - start
+        logger.info(f"Chunk {index} done — {scored_rows} rows in {elapsed:.1f}s "
+                    f"({scored_rows / elapsed:,.0f} rows/s)")
+
+    chunks = iter_chunks(input_path, feature_list, chunk_rows, id_column)
+    n_chunks = 0
+    if workers == 1:
+        init_worker(model_format, cascade)
+        for index, first_row, x, ids in chunks:
+            n_chunks += 1
+            if index not in done:
+                record(score_chunk(index, first_row, x, ids, scale, parts_dir))
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(model_format, cascade)) as pool:
+            pending = set()
+            for index, first_row, x, ids in chunks:
+                n_chunks += 1
+                if index in done:
+                    continue
+                # Bound the chunks held in memory while workers catch up
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+                pending.add(pool.submit(score_chunk, index, first_row, x, ids, scale, parts_dir))
+            for future in wait(pending).done:
+                record(future.result())
+
+    merge_parts(parts_dir, range(n_chunks), output_path)
+    if not keep_parts:
+        shutil.rmtree(parts_dir)
+
+    elapsed = time.perf_counter() - start
+    total_rows = sum(done.values())
+    rate = scored_rows / elapsed if elapsed > 0 else 0.0
+    logger.info(f"Scored {scored_rows} rows ({n_errors} with errors, {total_rows} total) in "
+                f"{elapsed:.1f}s — {rate:,.0f} rows/s with {workers} workers -> {output_path}")
+    return {"rows": total_rows, "scored_rows": scored_rows, "errors": n_errors,
+            "seconds": round(elapsed, 3), "rows_per_second": round(rate, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/TSV of RIASEC answers offline.")
+    parser.add_argument("input", help="CSV or TSV with the 48 item columns (e.g. data/data.csv).")
+    parser.add_argument("output", help="Output file (Parquet when pyarrow is installed, else CSV).")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--scale", choices=["raw", "normalized"], default="raw",
+                        help="raw: 1–5 answers, normalized like prepare_data_48.py; normalized: already 0–1.")
+    parser.add_argument("--id-column", help="Input column copied to the output as 'id'.")
+    parser.add_argument("--model-format", default=os.getenv("MODEL_FORMAT", "auto"),
+                        choices=["auto", "pickle", "mmap", "quantized"])
+    parser.add_argument("--cascade", action="store_true",
+                        help="Score with the 6-dimension model first (see train_model.py --dimensions).")
+    parser.add_argument("--keep-parts", action="store_true", help="Keep per-chunk part files after merging.")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, args.workers, args.chunk_rows, args.scale,
+               args.id_column, args.model_format, args.keep_parts, args.cascade)
@@ -1,20 +1,31 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import joblib
-import functools
 
+from util.artifacts import bundle_exists, load_bundle
+from util.inference import InferenceEngine
+from util.validation import normalize_likert
 
-@functools.lru_cache()
+
+# cache_resource: one copy per server process, shared by every session
+@st.cache_resource
 def load_model():
     return joblib.load("model/logreg_model.pkl")
 
 
-@functools.lru_cache()
+@st.cache_resource
 def load_encoder():
     return joblib.load("model/label_encoder.pkl")
 
 
+@st.cache_resource
+def load_engine():
+    """Plain NumPy scorer; the pickle-free bundle when present, else built from the sklearn model."""
+    if bundle_exists():
+        return load_bundle()[0]
+    return InferenceEngine.from_sklearn(load_model(), load_encoder())
+
+
 # ---------------- REAL RIASEC ITEM DESCRIPTIONS ---------------- #
 ITEMS = {
     # Realistic
@@ -86,7 +97,36 @@ def predict_top5(model, encoder, input_norm):
     return encoder.inverse_transform(idx), probs[idx]
 
 
+def predict_top5_array(engine, answers):
+    """Raw 1–5 answers (48,) → top5 labels + probabilities, without pandas."""
+    pred, idx, probs = engine.predict(normalize_likert(np.asarray(answers, dtype=np.float64)), k=5)
+    return engine.classes[idx], probs[idx]
+
+
 # ---------------- STREAMLIT UI (NOT USED IN UNIT TESTS) ---------------- #
+@st.fragment
+def questionnaire(engine):
+    """Sliders + results; a slider change reruns only this fragment, not the page."""
+    st.subheader("Rate Each Activity:")
+
+    cols = st.columns(3)
+    answers = np.ones(len(ITEMS))
+
+    # Sliders default to 1 as requested
+    for idx, (item, desc) in enumerate(ITEMS.items()):
+        with cols[idx % 3]:
+            answers[idx] = st.slider(f"{item}: {desc}", 1, 5, 1)
+
+    live = st.toggle("Update predictions live as you move the sliders")
+    if live or st.button("Predict Career Path"):
+        st.subheader("Top-5 Predicted Career Paths")
+
+        labels, probs = predict_top5_array(engine, answers)
+
+        for label, p in zip(labels, probs):
+            st.write(f"**{label}** — {p*100:.2f}%")
+
+
 def run_app():
     st.set_page_config(page_title="Career Path Predictor", layout="wide")
 
@@ -102,30 +142,7 @@ def run_app():
     - **5 = Enjoy**  
     """)
 
-    model = load_model()
-    encoder = load_encoder()
-
-    st.subheader("Rate Each Activity:")
-
-    cols = st.columns(3)
-    user_data = {}
-
-    # Sliders default to 1 as requested
-    for idx, (item, desc) in enumerate(ITEMS.items()):
-        col = cols[idx % 3]
-        with col:
-            user_data[item] = st.slider(f"{item}: {desc}", 1, 5, 1)
-
-    input_df = pd.DataFrame([user_data])
-    input_norm = (input_df - 1) / 4
-
-    if st.button("Predict Career Path"):
-        st.subheader("Top-5 Predicted Career Paths")
-
-        labels, probs = predict_top5(model, encoder, input_norm)
-
-        for label, p in zip(labels, probs):
-            st.write(f"**{label}** — {p*100:.2f}%")
+    questionnaire(load_engine())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+import asyncio
+
+from util.admission import AdmissionController, BULK, INTERACTIVE
+
+
+def test_queued_interactive_requests_go_before_bulk():
+    controller = AdmissionController(max_concurrency=1, max_queue=10, timeout=1.0)
+    order = []
+
+    async def request(priority, name):
+        assert await controller.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        controller.release(priority)
+
+    async def run():
+        assert await controller.acquire(INTERACTIVE)
+        tasks = [asyncio.create_task(request(BULK, "bulk1")),
+                 asyncio.create_task(request(BULK, "bulk2"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(INTERACTIVE, "interactive")))
+        await asyncio.sleep(0)
+        assert controller.queued == {INTERACTIVE: 1, BULK: 2}
+        controller.release(INTERACTIVE)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["interactive", "bulk1", "bulk2"]
+    assert controller.active == {INTERACTIVE: 0, BULK: 0}
+
+
+def test_bulk_cannot_take_every_slot():
+    controller = AdmissionController(max_concurrency=2, max_queue=0, timeout=0.01)
+
+    async def run():
+        assert await controller.acquire(BULK)
+        assert not await controller.acquire(BULK)
+        assert await controller.acquire(INTERACTIVE)
+
+    asyncio.run(run())
+    assert controller.shed[BULK, "queue_full"] == 1
+
+
+def test_sheds_on_full_queue_and_timeout():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, timeout=0.02)
+
+    async def run():
+        assert await controller.acquire(INTERACTIVE)
+        return await asyncio.gather(controller.acquire(INTERACTIVE), controller.acquire(INTERACTIVE))
+
+    assert asyncio.run(run()) == [False, False]
+    assert controller.shed[INTERACTIVE, "queue_full"] == 1
+    assert controller.shed[INTERACTIVE, "timeout"] == 1
+    assert controller.queued[INTERACTIVE] == 0
+
+    stats = controller.stats()
+    assert stats["interactive"]["shed"] == {"queue_full": 1, "timeout": 1}
+    assert controller.retry_after == 1
+
+
+def test_cancelled_waiter_frees_its_place():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, timeout=1.0)
+
+    async def run():
+        assert await controller.acquire(INTERACTIVE)
+        waiter = asyncio.create_task(controller.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release(INTERACTIVE)
+
+    asyncio.run(run())
+    assert controller.queued[INTERACTIVE] == 0
+    assert controller.active[INTERACTIVE] == 0
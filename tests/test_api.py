@@ -23,3 +23,298 @@ def test_predict_endpoint():
     assert "predicted_major" in data
     assert "top_5_predictions" in data
     assert isinstance(data["top_5_predictions"], list)
+
+
+def test_predict_matches_sklearn():
+    import numpy as np
+    from util.artifacts import load_pickle_artifacts
+
+    _, _, model, encoder = load_pickle_artifacts()
+    features = np.random.default_rng(0).random(48)
+    resp = client.post("/predict", json={"features": features.tolist()})
+    assert resp.status_code == 200
+    data = resp.json()
+
+    probas = model.predict_proba(features.reshape(1, -1))[0]
+    top5_idx = np.argsort(probas)[-5:][::-1]
+
+    assert data["predicted_major"] == encoder.inverse_transform(model.predict(features.reshape(1, -1)))[0]
+    assert [p["major"] for p in data["top_5_predictions"]] == encoder.inverse_transform(top5_idx).tolist()
+    assert [p["probability"] for p in data["top_5_predictions"]] == probas[top5_idx].round(3).tolist()
+
+
+def test_predict_wrong_length():
+    resp = client.post("/predict", json={"features": [0.0] * 47})
+    assert resp.status_code == 400
+
+
+def test_predict_batch_matches_single():
+    rows = [[0.0] * 48, [0.5] * 48, [1.0] * 48]
+    resp = client.post("/predict/batch", json={"features": rows})
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["n_rows"] == 3
+    assert data["n_errors"] == 0
+    for i, row in enumerate(rows):
+        single = client.post("/predict", json={"features": row}).json()
+        result = data["results"][i]
+        assert result["row"] == i
+        assert result["predicted_major"] == single["predicted_major"]
+        assert result["top_5_predictions"] == single["top_5_predictions"]
+
+
+def test_predict_batch_reports_bad_rows():
+    rows = [[0.1] * 48, [0.1] * 10, [0.2] * 48]
+    resp = client.post("/predict/batch", json={"features": rows})
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["n_errors"] == 1
+    assert "error" in data["results"][1]
+    assert "predicted_major" in data["results"][0]
+    assert "predicted_major" in data["results"][2]
+
+
+def test_predict_batch_reports_bad_types_per_row():
+    rows = [[0.5] * 48, [None] * 48, "not a row", [0.5] * 47 + ["abc"], [0.2] * 48]
+    resp = client.post("/predict/batch", json={"features": rows})
+    assert resp.status_code == 200
+
+    data = resp.json()
+    assert data["n_errors"] == 3
+    for i in (1, 2, 3):
+        assert data["results"][i]["row"] == i
+        assert "error" in data["results"][i]
+    assert data["results"][3]["error"].endswith("(value 47)")
+    assert "predicted_major" in data["results"][0]
+    assert "predicted_major" in data["results"][4]
+
+
+def test_oversized_batch_is_refused_before_parsing():
+    from util.limits import BodyLimitMiddleware
+
+    limited = TestClient(BodyLimitMiddleware(app, {"/predict/batch": (2048, "Batch exceeds 1 rows.")}))
+    resp = limited.post("/predict/batch", json={"features": [[0.5] * 48] * 100})
+    assert resp.status_code == 413
+    assert resp.json() == {"detail": "Batch exceeds 1 rows."}
+
+    assert limited.post("/predict/batch", json={"features": [[0.5] * 48]}).status_code == 200
+    assert limited.post("/predict", json={"features": [0.5] * 48 * 100}).status_code == 400
+
+
+def test_predict_with_microbatching(monkeypatch):
+    import app as app_module
+    from util.batching import MicroBatcher
+    from util.cache import ResultCache
+
+    monkeypatch.setattr(app_module, "result_cache", ResultCache(capacity=0))
+    expected = client.post("/predict", json={"features": [0.3] * 48}).json()
+
+    monkeypatch.setattr(app_module, "batcher", MicroBatcher(app_module.render_batch, window_ms=1))
+    resp = client.post("/predict", json={"features": [0.3] * 48})
+    assert resp.status_code == 200
+    assert resp.json() == expected
+
+    stats = client.get("/stats").json()["batching"]
+    assert stats["requests"] == 1
+
+
+def test_pinned_snapshot_is_not_served_another_versions_result(monkeypatch):
+    import asyncio
+    import dataclasses
+    import numpy as np
+    import app as app_module
+    from util.batching import MicroBatcher
+    from util.cache import ResultCache, quantize_key
+    from util.metrics import StageTimer
+
+    old = app_module.store.current
+    # The swapped-in model: same weights, but every answer renders as a fixed body
+    class V2Labels:
+        def render(self, *args, **kwargs):
+            return b'{"from":"v2"}'
+
+    new = dataclasses.replace(old, version="v2", labels=V2Labels())
+    monkeypatch.setattr(app_module.store, "current", new)
+    x = np.full(48, 0.25)
+    cache = ResultCache(capacity=16)
+    # The model was swapped after the request pinned `old`; the cache now holds v2 results
+    cache.bind("v2")
+    cache.put(quantize_key(x), b'{"from":"v2"}', version="v2")
+    monkeypatch.setattr(app_module, "result_cache", cache)
+
+    for batcher in (None, MicroBatcher(app_module.render_batch, window_ms=1)):
+        monkeypatch.setattr(app_module, "batcher", batcher)
+        content, version = asyncio.run(app_module.score_features(old, x, StageTimer(app_module.PREDICT_STAGES)))
+        assert version == old.version
+        assert content == old.render_rows(x[None, :])[0]
+
+
+def test_predict_binary_formats_match_json():
+    import numpy as np
+
+    likert = np.array([1, 2, 3, 4, 5, 3] * 8, dtype=np.uint8)
+    features = ((likert - 1) / 4).astype("<f4")
+    expected = client.post("/predict", json={"features": features.tolist()}).json()
+
+    resp = client.post(
+        "/predict", content=features.tobytes(),
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == expected
+
+    resp = client.post(
+        "/predict", content=likert.tobytes(),
+        headers={"content-type": "application/x-riasec-likert"},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == expected
+
+
+def test_predict_rejects_out_of_range():
+    resp = client.post("/predict", json={"features": [2.0] * 48})
+    assert resp.status_code == 400
+
+    resp = client.post("/predict", json={"features": "abc"})
+    assert resp.status_code == 422
+
+
+def test_predict_422_body_is_unchanged():
+    # Same error contract as when /predict took a pydantic body model
+    resp = client.post("/predict", json={"features": [0.5, "x"]})
+    assert resp.status_code == 422
+    assert resp.json() == {"detail": [{
+        "type": "float_parsing", "loc": ["body", "features", 1],
+        "msg": "Input should be a valid number, unable to parse string as a number", "input": "x",
+    }]}
+
+    resp = client.post("/predict", content=b'{"features": [1,2', headers={"content-type": "application/json"})
+    assert resp.status_code == 422
+    assert resp.json() == {"detail": [{
+        "type": "json_invalid", "loc": ["body", 17], "msg": "JSON decode error",
+        "input": {}, "ctx": {"error": "Expecting ',' delimiter"},
+    }]}
+
+
+def test_repeated_profile_served_from_cache():
+    from app import result_cache
+
+    payload = {"features": [0.25] * 48}
+    first = client.post("/predict", json=payload)
+    hits = result_cache.hits
+    second = client.post("/predict", json=payload)
+
+    assert second.json() == first.json()
+    assert result_cache.hits == hits + 1
+    assert client.get("/stats").json()["cache"]["hits"] >= 1
+
+
+def test_admin_reload_requires_token(monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", None)
+    assert client.post("/admin/reload").status_code == 403
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    resp = client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 200
+    version = resp.json()["model_version"]
+
+    predict = client.post("/predict", json={"features": [0.0] * 48})
+    assert predict.headers["X-Model-Version"] == version
+
+
+def test_failed_reload_does_not_leak_the_cause(monkeypatch):
+    import app as app_module
+
+    def fail():
+        raise FileNotFoundError("/srv/models/model_bundle.npz")
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module.store, "reload", fail)
+    resp = client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 500
+    assert resp.json() == {"detail": f"Reload failed, still serving {app_module.store.current.version}"}
+
+
+def test_metrics_endpoint_reports_stages():
+    client.post("/predict", json={"features": [0.75] * 48})
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+
+    text = resp.text
+    assert 'prediction_stage_seconds_count{route="/predict",stage="parse"}' in text
+
+    # Decoding and building the vector are timed separately on every /predict call
+    def counts():
+        text = client.get("/metrics").text
+        prefix = 'prediction_stage_seconds_count{route="/predict",stage="%s"} '
+        return [
+            next(float(line[len(prefix % stage):]) for line in text.splitlines() if line.startswith(prefix % stage))
+            for stage in ("parse", "build")
+        ]
+
+    before = counts()
+    client.post("/predict", json={"features": [0.25] * 48})
+    assert [a - b for a, b in zip(counts(), before)] == [1, 1]
+    assert 'http_requests_total{method="POST",route="/predict",status="200"}' in text
+    assert "model_info{" in text
+
+
+def test_predict_stream_csv_and_ndjson(monkeypatch):
+    import json
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "STREAM_CHUNK_ROWS", 2)
+    features = list(app_module.store.current.feature_list)
+    expected = client.post("/predict", json={"features": [0.5] * 48}).json()
+
+    lines = ["id," + ",".join(features)] + [f"{i}," + ",".join(["0.5"] * 48) for i in range(5)]
+    lines.append("bad," + ",".join(["9"] * 48))
+    resp = client.post("/predict/stream", content="\n".join(lines), headers={"content-type": "text/csv"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["row"] for r in results] == list(range(6))
+    assert results[0]["top_5_predictions"] == expected["top_5_predictions"]
+    assert "error" in results[5]
+
+    # Raw Likert answers normalized on the fly
+    body = json.dumps({"features": [3] * 48}) + "\n"
+    resp = client.post("/predict/stream?likert=true", content=body,
+                       headers={"content-type": "application/x-ndjson"})
+    assert json.loads(resp.text)["predicted_major"] == expected["predicted_major"]
+
+
+def test_predict_stream_rejects_bad_uploads():
+    resp = client.post("/predict/stream", content="a,b\n1,2", headers={"content-type": "text/csv"})
+    assert resp.status_code == 400
+
+    resp = client.post("/predict/stream", content="x", headers={"content-type": "text/plain"})
+    assert resp.status_code == 415
+
+
+def test_overload_is_shed_with_503(monkeypatch):
+    import app as app_module
+
+    admission = app_module.admission
+    monkeypatch.setattr(admission, "max_concurrency", 0)
+    monkeypatch.setattr(admission, "max_queue", 0)
+
+    resp = client.post("/predict", json={"features": [0.5] * 48})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+
+    # Routes outside admission control still answer
+    assert client.get("/").status_code == 200
+    assert client.get("/stats").json()["admission"]["interactive"]["shed"]["queue_full"] >= 1
+    text = client.get("/metrics").text
+    assert 'admission_shed_total{priority="interactive",reason="queue_full"}' in text
+    assert 'http_requests_total{method="POST",route="/predict",status="503"}' in text
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from util.artifacts import (
+    BUNDLE_PATH, BUNDLE_META_PATH,
+    save_bundle, load_bundle, load_pickle_artifacts, bundle_exists, save_quantized, load_quantized,
+)
+from util.inference import InferenceEngine, QuantizedEngine
+
+
+@pytest.fixture
+def small_engine():
+    rng = np.random.default_rng(0)
+    return InferenceEngine(rng.random((4, 3)), rng.random(3), ["a", "b", "c"])
+
+
+def test_bundle_roundtrip(tmp_path, small_engine):
+    npz, meta = tmp_path / "b.npz", tmp_path / "b.json"
+    save_bundle(small_engine, ["f1", "f2", "f3", "f4"], npz, meta)
+    assert bundle_exists(npz, meta)
+
+    engine, features, header = load_bundle(npz, meta)
+    assert features == ["f1", "f2", "f3", "f4"]
+    assert header["n_classes"] == 3
+    assert np.array_equal(engine.weights, small_engine.weights)
+    assert engine.classes.tolist() == ["a", "b", "c"]
+
+
+def test_bundle_rejects_tampered_weights(tmp_path, small_engine):
+    npz, meta = tmp_path / "b.npz", tmp_path / "b.json"
+    save_bundle(small_engine, ["f1", "f2", "f3", "f4"], npz, meta)
+    np.savez(npz, weights=small_engine.weights + 1, bias=small_engine.bias)
+
+    with pytest.raises(ValueError):
+        load_bundle(npz, meta)
+
+
+def test_bundle_feature_mismatch(tmp_path, small_engine):
+    with pytest.raises(ValueError):
+        save_bundle(small_engine, ["f1"], tmp_path / "b.npz", tmp_path / "b.json")
+
+
+def test_quantized_roundtrip_and_agreement_gate(tmp_path, small_engine):
+    npz, meta = tmp_path / "q.npz", tmp_path / "q.json"
+    quantized = QuantizedEngine.from_engine(small_engine, "int8")
+    save_quantized(quantized, ["f1", "f2", "f3", "f4"], {"top1_agreement": 0.97}, npz, meta)
+
+    engine, features, header = load_quantized(npz, meta, min_agreement=0.95)
+    assert header["dtype"] == "int8"
+    assert np.array_equal(engine.weights, quantized.weights)
+    assert np.allclose(engine.scales, quantized.scales)
+
+    with pytest.raises(ValueError, match="agreement"):
+        load_quantized(npz, meta, min_agreement=0.99)
+
+
+def test_shipped_bundle_matches_pickled_model():
+    if not bundle_exists():
+        pytest.skip("No bundle exported")
+
+    bundle_engine, features, _ = load_bundle(BUNDLE_PATH, BUNDLE_META_PATH)
+    _, pickle_features, model, _ = load_pickle_artifacts()
+
+    assert features == pickle_features
+    bundle_engine.verify_against(model)
+
+
+def test_shared_file_roundtrip_is_memory_mapped(tmp_path, small_engine):
+    from util.artifacts import save_shared, load_shared
+
+    path = tmp_path / "shared.bin"
+    save_shared(small_engine, ["f1", "f2", "f3", "f4"], path)
+
+    engine, features, header = load_shared(path)
+    assert features == ["f1", "f2", "f3", "f4"]
+    assert engine.classes.tolist() == ["a", "b", "c"]
+    assert np.array_equal(engine.weights, small_engine.weights)
+    assert not engine.weights.flags.writeable
+    assert header["weights"]["shape"] == [4, 3]
+
+    x = np.full(4, 0.5)
+    assert np.allclose(engine.predict_proba(x), small_engine.predict_proba(x))
+
+
+def test_shared_file_rejects_other_files(tmp_path):
+    from util.artifacts import load_shared
+
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"not a model")
+    with pytest.raises(ValueError):
+        load_shared(path)
+
+
+def test_mapping_memory_reports_mapped_file(tmp_path, small_engine):
+    from util.artifacts import save_shared, load_shared
+    from util.memory import process_memory, mapping_memory
+
+    path = tmp_path / "shared.bin"
+    save_shared(small_engine, ["f1", "f2", "f3", "f4"], path)
+    engine, _, _ = load_shared(path)
+    engine.predict_proba(np.zeros(4))
+
+    usage = process_memory()
+    if usage is None:
+        pytest.skip("/proc not available")
+    assert usage["rss_mb"] > 0
+    assert mapping_memory(path)["Rss"] > 0
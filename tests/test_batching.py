@@ -0,0 +1,76 @@
+import asyncio
+import numpy as np
+
+from util.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def score(x, context):
+        calls.append(len(x))
+        return x.sum(axis=1).tolist()
+
+    batcher = MicroBatcher(score, max_batch_size=8, window_ms=20)
+
+    async def run():
+        # Prime the batcher so the next burst is treated as concurrent traffic
+        await asyncio.gather(*(batcher.submit(np.full(4, 0.0)) for _ in range(2)))
+        return await asyncio.gather(*(batcher.submit(np.full(4, float(i))) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert results == [4.0 * i for i in range(10)]
+    assert max(calls) > 1
+    assert all(size <= 8 for size in calls)
+
+    stats = batcher.stats()
+    assert stats["requests"] == 12
+    assert stats["batches"] == len(calls)
+    assert stats["max_batch_size"] == max(calls)
+    assert stats["queue_wait_ms_max"] >= 0
+
+
+def test_single_request_is_not_delayed():
+    batcher = MicroBatcher(lambda x, context: [len(x)], window_ms=1000)
+
+    async def run():
+        return await asyncio.wait_for(batcher.submit(np.zeros(4)), timeout=0.5)
+
+    assert asyncio.run(run()) == 1
+
+
+def test_scoring_error_reaches_every_caller():
+    def score(x, context):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(score)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(np.zeros(4)) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_requests_are_scored_with_their_own_context():
+    calls = []
+
+    def score(x, context):
+        calls.append((context, len(x)))
+        return [context] * len(x)
+
+    batcher = MicroBatcher(score, max_batch_size=8, window_ms=20)
+    old, new = object(), object()
+
+    async def run():
+        await asyncio.gather(*(batcher.submit(np.zeros(4), old) for _ in range(2)))
+        contexts = [old, new, old, new, new]
+        return contexts, await asyncio.gather(*(batcher.submit(np.zeros(4), c) for c in contexts))
+
+    contexts, results = asyncio.run(run())
+    assert results == contexts
+    assert {c for c, _ in calls} == {old, new}
+    assert batcher.stats()["requests"] == 7
@@ -0,0 +1,65 @@
+import numpy as np
+
+from util.cache import ResultCache, quantize_key
+
+
+def test_quantize_key_packs_likert_grid():
+    x = (np.array([1, 2, 3, 4, 5] * 9 + [1, 1, 1]) - 1) / 4
+    key = quantize_key(x)
+    assert len(key) == 48
+    assert key == quantize_key(x.copy())
+
+
+def test_quantize_key_keeps_off_grid_values_exact():
+    x = np.full(48, 0.3)
+    y = x.copy()
+    y[0] = 0.3000001
+    assert len(quantize_key(x)) == 48 * 8
+    assert quantize_key(x) != quantize_key(y)
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(capacity=2)
+    cache.put(b"a", b"1")
+    cache.put(b"b", b"2")
+    assert cache.get(b"a") == b"1"   # a becomes most recent
+    cache.put(b"c", b"3")            # evicts b
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"c") == b"3"
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_bind_new_version_invalidates():
+    cache = ResultCache(capacity=4)
+    cache.bind("v1")
+    cache.put(b"a", b"1")
+
+    cache.bind("v1")
+    assert cache.get(b"a") == b"1"
+
+    cache.bind("v2")
+    assert cache.get(b"a") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_get_ignores_entries_of_another_version():
+    cache = ResultCache(capacity=4)
+    cache.bind("v2")
+    cache.put(b"a", b"new", version="v2")
+
+    # A request still pinned to v1 must not get v2's body
+    assert cache.get(b"a", version="v1") is None
+    assert cache.get(b"a", version="v2") == b"new"
+    assert cache.get(b"a") == b"new"
+
+
+def test_zero_capacity_disables_cache():
+    cache = ResultCache(capacity=0)
+    cache.put(b"a", b"1")
+    assert len(cache) == 0
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from util.cascade import (
+    TIER_DIMENSIONS, TIER_ITEMS, Cascade, align_classes, calibrate, confidence, pooling_matrix,
+)
+from util.inference import InferenceEngine
+
+ITEMS = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
+DIMENSIONS = [f"{c}_pct" for c in "RIASEC"]
+CLASSES = ["a", "b", "c", "d"]
+
+
+@pytest.fixture
+def engines():
+    rng = np.random.default_rng(0)
+    fast = InferenceEngine(rng.normal(size=(6, 3)) * 4, rng.normal(size=3), ["c", "a", "b"])
+    full = InferenceEngine(rng.normal(size=(48, 4)), rng.normal(size=4), CLASSES)
+    x = (rng.integers(1, 6, size=(500, 48)) - 1) / 4
+    return fast, full, x
+
+
+def test_pooling_matrix_takes_dimension_means():
+    pool = pooling_matrix(ITEMS, DIMENSIONS)
+    x = np.repeat(np.arange(6) / 5, 8)
+    assert np.allclose(x @ pool, np.arange(6) / 5)
+
+
+def test_align_classes_zeroes_unseen_classes(engines):
+    fast, _, x = engines
+    aligned = align_classes(fast, CLASSES)
+    x6 = x[:10] @ pooling_matrix(ITEMS, DIMENSIONS)
+
+    probas = aligned.predict_proba(x6)
+    assert aligned.classes.tolist() == CLASSES
+    assert (probas[:, 3] == 0).all()
+    assert np.allclose(probas[:, [2, 0, 1]], fast.predict_proba(x6))
+
+    with pytest.raises(ValueError):
+        align_classes(fast, ["a", "b"])
+
+
+def test_confidence_metrics():
+    probas = np.array([[0.7, 0.2, 0.1], [0.4, 0.35, 0.25]])
+    assert np.allclose(confidence(probas, "margin"), [0.5, 0.05])
+    assert confidence(probas, "entropy")[0] > confidence(probas, "entropy")[1]
+
+
+@pytest.mark.parametrize("metric", ["margin", "entropy"])
+def test_cascade_routes_by_threshold(engines, metric):
+    fast, full, x = engines
+    everything = Cascade(fast, ITEMS, DIMENSIONS, metric, -1e9 if metric == "margin" else 1e9, CLASSES)
+    nothing = Cascade(fast, ITEMS, DIMENSIONS, metric, 1e9 if metric == "margin" else -1e9, CLASSES)
+
+    _, _, _, tiers = everything.predict(x, full)
+    assert set(tiers) == {TIER_DIMENSIONS}
+
+    pred, top, probas, tiers = nothing.predict(x, full)
+    assert set(tiers) == {TIER_ITEMS}
+    assert np.array_equal(pred, full.predict(x)[0])
+
+    pred, _, _, tier = nothing.predict(x[0], full)
+    assert tier == TIER_ITEMS and pred == full.predict(x[0])[0]
+    assert nothing.stats()["rows"] == {TIER_DIMENSIONS: 0, TIER_ITEMS: len(x) + 1}
+
+
+def test_row_counts_survive_concurrent_batches(engines):
+    from concurrent.futures import ThreadPoolExecutor
+
+    fast, full, x = engines
+    cascade = Cascade(fast, ITEMS, DIMENSIONS, "margin", 0.1, CLASSES)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: cascade.predict(x[i % len(x)], full), range(2000)))
+    assert sum(cascade.stats()["rows"].values()) == 2000
+
+
+@pytest.mark.parametrize("metric", ["margin", "entropy"])
+def test_calibrate_meets_target_agreement(engines, metric):
+    fast, full, x = engines
+    cascade = Cascade(fast, ITEMS, DIMENSIONS, metric, 0.0, CLASSES)
+    threshold, report = calibrate(cascade, full, x, target_agreement=0.9)
+
+    calibrated = Cascade(fast, ITEMS, DIMENSIONS, metric, threshold, CLASSES)
+    pred, _, _, tiers = calibrated.predict(x, full)
+    agreement = (pred == full.predict(x)[0]).mean()
+
+    assert agreement >= 0.9
+    assert agreement == pytest.approx(report["chosen"]["agreement"])
+    assert (tiers == TIER_DIMENSIONS).mean() == pytest.approx(report["chosen"]["dimensions_share"])
+    assert report["curve"][0]["agreement"] == 1.0
+    assert report["curve"][-1]["agreement"] == pytest.approx(report["dimensions_alone_agreement"])
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from util.dataset import PreparedWriter, likert_codes, load_prepared, read_prepared, save_prepared
+
+ITEMS = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
+
+
+@pytest.fixture
+def prepared():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame((rng.integers(1, 6, size=(60, 48)) - 1) / 4, columns=ITEMS)
+    df["major"] = rng.choice(["psycology", "biology", "nan", "art"], 60)
+    df["major_standard"] = rng.choice(["Psychology", "Biology", "Fine Arts"], 60)
+    return df
+
+
+def test_npz_round_trips_with_compact_dtypes(tmp_path, prepared):
+    path = str(tmp_path / "final.npz")
+    save_prepared(prepared, path, ITEMS)
+
+    with np.load(path) as data:
+        assert data["likert"].dtype == np.uint8
+        assert data["labels"].dtype == np.int16
+        assert list(data["classes"]) == ["Biology", "Fine Arts", "Psychology"]
+    pd.testing.assert_frame_equal(read_prepared(path), prepared)
+
+    x, labels, classes, names = load_prepared(path)
+    assert names == ITEMS
+    np.testing.assert_array_equal(x, prepared[ITEMS].to_numpy())
+    assert (classes[labels] == prepared["major_standard"]).all()
+
+
+def test_non_likert_features_are_stored_as_float32(tmp_path, prepared):
+    df = prepared[["R1", "major_standard"]].assign(R1=np.linspace(0, 1, len(prepared)))
+    assert likert_codes(df[["R1"]].to_numpy()) is None
+
+    path = str(tmp_path / "final.npz")
+    save_prepared(df, path, ["R1"])
+    with np.load(path) as data:
+        assert data["features"].dtype == np.float32
+    np.testing.assert_allclose(load_prepared(path)[0][:, 0], df["R1"], rtol=1e-6)
+
+
+def test_csv_and_npz_load_alike(tmp_path, prepared):
+    save_prepared(prepared, str(tmp_path / "final.csv"), ITEMS)
+    save_prepared(prepared, str(tmp_path / "final.npz"), ITEMS)
+
+    from_csv = load_prepared(str(tmp_path / "final.csv"))
+    from_npz = load_prepared(str(tmp_path / "final.npz"))
+    for a, b in zip(from_csv, from_npz):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_writer_matches_save_prepared(tmp_path, prepared):
+    save_prepared(prepared, str(tmp_path / "whole.npz"), ITEMS)
+
+    writer = PreparedWriter(
+        str(tmp_path / "chunked.npz"), len(prepared), ITEMS,
+        sorted(prepared["major_standard"].unique()), sorted(prepared["major"].unique()),
+    )
+    for start in range(0, len(prepared), 25):
+        writer.write(prepared.iloc[start:start + 25])
+    writer.close()
+
+    pd.testing.assert_frame_equal(read_prepared(str(tmp_path / "chunked.npz")), prepared)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chunked.npz", "whole.npz"]
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from util.dedupe import RowHashSet, hash_rows
+
+
+def test_first_seen_matches_drop_duplicates_across_chunks():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.integers(0, 4, 500), "b": rng.choice(["x", "y"], 500)})
+
+    seen = RowHashSet()
+    masks = [seen.first_seen(df.iloc[i:i + 64]) for i in range(0, len(df), 64)]
+
+    kept = df[np.concatenate(masks)]
+    pd.testing.assert_frame_equal(kept, df.drop_duplicates())
+    assert len(seen) == len(kept)
+
+
+def test_hash_ignores_index_and_int_float_dtype():
+    ints = pd.DataFrame({"a": [1, 2], "m": ["x", "y"]})
+    floats = pd.DataFrame({"a": [1.0, 2.0], "m": ["x", "y"]}, index=[10, 11])
+    assert (hash_rows(ints) == hash_rows(floats)).all()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from util.fastpath import FastPathMiddleware
+from util.metrics import Counter
+
+outcomes = Counter("fast_path_requests_total", "test", ("outcome",))
+fast = TestClient(FastPathMiddleware(app_module.app, "/predict", app_module.predict_fast, outcomes))
+slow = TestClient(app_module.app)
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(app_module.result_cache, "capacity", 0)
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", b'{"features": [' + b", ".join([b"0.25"] * 47 + [b"1"]) + b"]}"),
+    ("application/octet-stream", np.full(48, 0.5, dtype="<f4").tobytes()),
+    ("application/x-riasec-likert", bytes([3] * 48)),
+])
+def test_fast_path_matches_fastapi(content_type, body):
+    served = outcomes.labels("served").value
+    a = fast.post("/predict", content=body, headers={"content-type": content_type})
+    b = slow.post("/predict", content=body, headers={"content-type": content_type})
+
+    assert a.status_code == b.status_code == 200
+    assert a.content == b.content
+    assert a.headers["x-model-version"] == b.headers["x-model-version"]
+    assert a.headers["content-type"] == b.headers["content-type"]
+    assert outcomes.labels("served").value == served + 1
+
+
+@pytest.mark.parametrize("body", [
+    b'{"features": [0.5, 0.5]}',                            # wrong length -> 400
+    b'{"features": [' + b", ".join([b"2"] * 48) + b"]}",    # out of range -> 400
+    b'{"features": "nope"}',                                # schema error -> 422
+    b"not json",                                            # -> 422
+    b'{"features": [' + b", ".join([b'"0.5"'] * 48) + b"]}",  # pydantic coerces -> 200
+])
+def test_other_requests_fall_through_unchanged(body):
+    fell_through = outcomes.labels("fell_through").value
+    a = fast.post("/predict", content=body, headers={"content-type": "application/json"})
+    b = slow.post("/predict", content=body, headers={"content-type": "application/json"})
+
+    assert a.status_code == b.status_code
+    assert a.json() == b.json()
+    assert outcomes.labels("fell_through").value == fell_through + 1
+
+
+def test_fallen_through_request_is_timed_once():
+    parse, build = app_module.PREDICT_STAGES["parse"], app_module.PREDICT_STAGES["build"]
+    before = sum(parse.counts), sum(build.counts)
+    body = b'{"features": [' + b", ".join([b"2"] * 48) + b"]}"  # fails in build, after parsing
+
+    assert fast.post("/predict", content=body, headers={"content-type": "application/json"}).status_code == 400
+    assert (sum(parse.counts), sum(build.counts)) == (before[0] + 1, before[1])
+
+
+def test_other_routes_pass_through():
+    assert fast.get("/").json() == slow.get("/").json()
+    assert fast.get("/docs").status_code == 200
+
+
+def test_benchmark_runs(capsys):
+    from benchmarks.fastpath import main
+
+    assert main(["--requests", "60", "--unique", "5"]) == 0
+    assert "Overhead removed per request" in capsys.readouterr().out
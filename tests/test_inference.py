@@ -0,0 +1,86 @@
+import pickle
+import numpy as np
+import pytest
+
+from util.inference import InferenceEngine, QuantizedEngine, quantize_weights
+
+
+MODEL_PATH = "model/logreg_model.pkl"
+ENCODER_PATH = "model/label_encoder.pkl"
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    with open(ENCODER_PATH, "rb") as f:
+        encoder = pickle.load(f)
+    return model, encoder
+
+
+def test_engine_matches_sklearn(artifacts):
+    model, encoder = artifacts
+    engine = InferenceEngine.from_sklearn(model, encoder)
+
+    x = np.random.default_rng(1).random((20, engine.n_features))
+    pred, top5, probas = engine.predict(x)
+
+    assert np.allclose(probas, model.predict_proba(x), rtol=0, atol=1e-12)
+    assert (engine.classes[pred] == encoder.inverse_transform(model.predict(x))).all()
+
+    expected_top5 = np.argsort(model.predict_proba(x), axis=1)[:, -5:][:, ::-1]
+    assert (top5 == expected_top5).all()
+
+
+def test_engine_single_vector(artifacts):
+    model, encoder = artifacts
+    engine = InferenceEngine.from_sklearn(model, encoder)
+
+    x = np.full(engine.n_features, 0.5)
+    pred, top5, probas = engine.predict(x, k=5)
+
+    assert probas.shape == (engine.n_classes,)
+    assert np.isclose(probas.sum(), 1.0)
+    assert top5.shape == (5,)
+    assert top5[0] == pred
+    assert probas[top5[0]] >= probas[top5[1]] >= probas[top5[4]]
+
+
+def test_verify_against_detects_mismatch(artifacts):
+    model, encoder = artifacts
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    assert engine.verify_against(model) < 1e-9
+
+    tampered = InferenceEngine(engine.weights * 1.01, engine.bias, engine.classes)
+    with pytest.raises(ValueError):
+        tampered.verify_against(model)
+
+
+def test_engine_rejects_bad_shapes():
+    with pytest.raises(ValueError):
+        InferenceEngine(np.zeros((4, 3)), np.zeros(2), ["a", "b", "c"])
+    with pytest.raises(ValueError):
+        InferenceEngine(np.zeros((4, 3)), np.zeros(3), ["a", "b"])
+
+
+def test_int8_quantization_is_per_class():
+    weights = np.array([[1.0, -0.01], [-0.5, 0.02]])
+    q, scales = quantize_weights(weights, "int8")
+    assert q.dtype == np.int8
+    assert np.abs(q).max(axis=0).tolist() == [127, 127]
+    assert np.allclose(q * scales, weights, atol=scales.max() / 2)
+
+
+@pytest.mark.parametrize("dtype, min_top1", [("float16", 0.995), ("int8", 0.98)])
+def test_quantized_engine_agrees_with_float64(artifacts, dtype, min_top1):
+    model, encoder = artifacts
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    quantized = QuantizedEngine.from_engine(engine, dtype)
+
+    x = (np.random.default_rng(2).integers(1, 6, size=(2000, engine.n_features)) - 1) / 4
+    report = quantized.agreement(engine, x)
+    assert report["top1_agreement"] >= min_top1
+
+    _, _, probas = quantized.predict(x[0])
+    assert probas.dtype == np.float64
+    assert np.isclose(probas.sum(), 1.0)
@@ -0,0 +1,52 @@
+import json
+
+from benchmarks.load_test import compare, percentile_summary, recorded_inputs, synthetic_inputs, main
+
+
+def test_percentile_summary():
+    summary = percentile_summary([0.001] * 98 + [0.010, 0.020], elapsed=1.0, errors=0)
+    assert summary["requests"] == 100
+    assert summary["rps"] == 100.0
+    assert summary["p50_ms"] == 1.0
+    assert summary["p99_ms"] > summary["p95_ms"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"levels": [{"concurrency": 8, "p95_ms": 2.0, "p99_ms": 4.0, "rps": 1000, "errors": 0}]}
+    same = [{"concurrency": 8, "p95_ms": 2.1, "p99_ms": 4.2, "rps": 950, "errors": 0}]
+    worse = [{"concurrency": 8, "p95_ms": 2.1, "p99_ms": 6.0, "rps": 700, "errors": 0}]
+
+    assert compare(same, baseline, threshold=0.2) == []
+    problems = compare(worse, baseline, threshold=0.2)
+    assert any("p99_ms" in p for p in problems)
+    assert any("rps" in p for p in problems)
+
+
+def test_recorded_inputs_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "rows.csv"
+    header = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)] + ["major_standard"]
+    csv_path.write_text(",".join(header) + "\n" + ",".join(["0.5"] * 48 + ["Biology"]) + "\n")
+    assert recorded_inputs(str(csv_path)) == [[0.5] * 48]
+
+    jsonl_path = tmp_path / "rows.jsonl"
+    jsonl_path.write_text(json.dumps({"features": [0.25] * 48}) + "\n")
+    assert recorded_inputs(str(jsonl_path)) == [[0.25] * 48]
+
+
+def test_in_process_run_writes_results(tmp_path):
+    out = tmp_path / "bench.json"
+    assert len(synthetic_inputs(5)) == 5
+
+    code = main(["--concurrency", "2", "--requests", "20", "--warmup", "5",
+                 "--unique", "10", "--output", str(out)])
+    assert code == 0
+
+    results = json.loads(out.read_text())
+    level = results["levels"][0]
+    assert level["concurrency"] == 2
+    assert level["requests"] == 20
+    assert level["errors"] == 0
+
+    # Comparing a run against itself with a generous threshold passes
+    assert main(["--concurrency", "2", "--requests", "20", "--warmup", "5", "--unique", "10",
+                 "--baseline", str(out), "--threshold", "10"]) == 0
@@ -9,3 +9,46 @@ def test_logger_creates_log_dir(tmp_path, monkeypatch):
     logger.info("Hello")
 
     assert os.path.exists("logs/test.log")
+
+
+def test_queued_logger_writes_in_background(tmp_path, monkeypatch):
+    import threading
+    from util.logger import LazyStr, _listeners
+
+    monkeypatch.chdir(tmp_path)
+
+    calls = []
+
+    def payload():
+        calls.append(threading.current_thread())
+        return [0.25, 0.5]
+
+    logger = get_logger("test_queued", "queued.log", queued=True)
+    logger.info("Input=%s", LazyStr(payload))
+    _listeners.pop(os.path.abspath("logs/queued.log")).stop()
+
+    with open("logs/queued.log", encoding="utf-8") as f:
+        assert "Input=[0.25, 0.5]" in f.read()
+    # Formatting happened on the background writer, not the caller
+    assert calls and threading.main_thread() not in calls
+
+
+def test_rotation_reopens_file_rotated_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    logger = get_logger("test_rotation", "rotate.log")
+    logger.info("first")
+
+    # Simulate another worker rotating the file
+    os.rename("logs/rotate.log", "logs/rotate.log.1")
+    logger.info("second")
+
+    with open("logs/rotate.log", encoding="utf-8") as f:
+        assert "second" in f.read()
+
+
+def test_payload_sampler_rate():
+    from util.logger import PayloadSampler
+
+    assert PayloadSampler(1.0)()
+    assert not any(PayloadSampler(0.0)() for _ in range(100))
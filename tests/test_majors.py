@@ -0,0 +1,78 @@
+import pandas as pd
+from rapidfuzz import process, fuzz
+
+from util.categories_list import standardized_categories
+from util.major_mapping import major_mapping
+from util.majors import (
+    FUZZY_THRESHOLD, clean_majors, fuzzy_match_unique, load_resolutions, resolution_version, resolve_majors,
+)
+
+RAW = ["psycology", "biolgy", "computer sci", "xyz", "buisness admin", "nursing", "art", "zzzz qqq"]
+
+
+def test_fuzzy_match_unique_matches_extract_one():
+    expected = {}
+    for s in RAW:
+        match, score, _ = process.extractOne(s, standardized_categories, scorer=fuzz.WRatio)
+        expected[s] = match if score >= FUZZY_THRESHOLD else "Other"
+
+    assert fuzzy_match_unique(RAW, block_size=3) == expected
+    assert "Other" in expected.values()
+
+
+def old_resolution(values):
+    """The per-row logic the prep scripts used before resolve_majors."""
+    from util.major_mapping import major_mapping
+
+    standard = values.map(major_mapping).fillna(values)
+    unmatched = standard == values
+    standard[unmatched] = values[unmatched].apply(
+        lambda x: (lambda m: m[0] if m[1] >= FUZZY_THRESHOLD else "Other")(
+            process.extractOne(x, standardized_categories, scorer=fuzz.WRatio)
+        )
+    )
+    return standard
+
+
+def test_resolve_majors_matches_per_row_logic(tmp_path):
+    values = pd.Series(RAW + ["biology", "psychology", "biolgy"], index=range(5, 16))
+    result = resolve_majors(values, cache_path=str(tmp_path / "res.json"))
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.astype(object).equals(old_resolution(values))
+    # Without fuzzy matching only the dictionary applies
+    plain = resolve_majors(values.astype("category"), fuzzy=False)
+    assert plain.astype(object).equals(values.map(major_mapping).fillna(values))
+
+
+def test_clean_majors_works_on_categories():
+    raw = pd.Series(["Biology!", "biology", " Art ", "Biology!", None], dtype="category", index=range(3, 8))
+    cleaned = clean_majors(raw)
+
+    assert sorted(cleaned.cat.categories) == ["art", "biology"]  # merged
+    assert cleaned.iloc[:4].tolist() == ["biology", "biology", "art", "biology"]
+    assert pd.isna(cleaned.iloc[4])
+    assert cleaned.index.equals(raw.index)
+
+
+def test_resolve_majors_only_matches_new_strings(tmp_path, monkeypatch):
+    import util.majors as majors
+
+    cache_path = str(tmp_path / "data" / "res.json")
+    seen = []
+    real = majors.fuzzy_match_unique
+    monkeypatch.setattr(majors, "fuzzy_match_unique", lambda strings: seen.append(list(strings)) or real(strings))
+
+    first = resolve_majors(pd.Series(["biolgy", "psycology", "biolgy"]), cache_path=cache_path)
+    second = resolve_majors(pd.Series(["psycology", "biolgy", "nursng"]), cache_path=cache_path)
+    assert seen == [["biolgy", "psycology"], ["nursng"]]
+    assert second[0] == first[1]
+
+    # A different mapping/category list/threshold starts from scratch
+    monkeypatch.setattr(majors, "resolution_version", lambda: "changed")
+    resolve_majors(pd.Series(["biolgy"]), cache_path=cache_path)
+    assert seen[-1] == ["biolgy"]
+    assert load_resolutions(cache_path, version="changed") == {"biolgy": first[0]}
+
+
+def test_resolution_version_covers_threshold():
+    assert resolution_version(threshold=70) != resolution_version(threshold=80)
@@ -0,0 +1,43 @@
+from util.metrics import Registry, StageTimer
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    child = hist.labels("parse")
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="parse"} 3' in text
+
+
+def test_counter_gauge_and_collectors():
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests.", ("status",))
+    gauge = registry.gauge("in_flight", "In flight.")
+    counter.labels(200).inc()
+    counter.labels(200).inc()
+    gauge.labels().inc()
+    gauge.labels().dec()
+    registry.add_collector(lambda: [("model_info", "gauge", "Model.", {(("version", 'a"b'),): 1})])
+
+    text = registry.render()
+    assert 'requests_total{status="200"} 2.0' in text
+    assert "in_flight 0.0" in text
+    assert 'model_info{version="a\\"b"} 1' in text
+
+
+def test_stage_timer_observes_each_stage():
+    registry = Registry()
+    hist = registry.histogram("stage_seconds", "Stages.", ("stage",))
+    timer = StageTimer({s: hist.labels(s) for s in ("parse", "inference")})
+    timer.mark("parse")
+    timer.mark("inference")
+
+    assert sum(hist.labels("parse").counts) == 1
+    assert 'stage_seconds_count{stage="inference"} 1' in registry.render()
@@ -41,3 +41,33 @@ def test_model_load_and_predict():
     assert y_pred.shape == (1,)
     label = encoder.inverse_transform(y_pred)[0]
     assert isinstance(label, str)
+
+
+def test_training_from_npz_matches_csv(tmp_path, monkeypatch):
+    import pandas as pd
+    import train_model
+    from util.dataset import save_prepared
+
+    rng = np.random.default_rng(0)
+    items = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
+    df = pd.DataFrame((rng.integers(1, 6, size=(300, 48)) - 1) / 4, columns=items)
+    df["major"] = "x"
+    df["major_standard"] = rng.choice(["Biology", "Nursing", "Psychology"], 300)
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    os.makedirs("model")
+    save_prepared(df, train_model.CSV_DATA_PATH, items)
+
+    coefs = []
+    for _ in range(2):
+        train_model.main()
+        with open(train_model.MODEL_PATH, "rb") as f:
+            model = pickle.load(f)
+        coefs.append(model.coef_)
+        assert list(model.feature_names_in_) == items
+        # Second run: the columnar file takes precedence over the CSV
+        save_prepared(df, train_model.DATA_PATH, items)
+
+    assert train_model.dataset_path() == train_model.DATA_PATH
+    np.testing.assert_array_equal(coefs[0], coefs[1])
@@ -0,0 +1,100 @@
+import time
+import numpy as np
+import pytest
+
+from util.artifacts import save_shared, save_quantized, save_cascade
+from util.inference import InferenceEngine, QuantizedEngine
+from util.model_store import ModelStore, load_snapshot
+
+
+FEATURES = ["f1", "f2", "f3", "f4"]
+
+
+def write_model(seed, features=FEATURES):
+    rng = np.random.default_rng(seed)
+    engine = InferenceEngine(rng.random((len(features), 3)), rng.random(3), ["a", "b", "c"])
+    save_shared(engine, features)
+    return engine
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "model").mkdir()
+    write_model(0)
+    return tmp_path
+
+
+def test_snapshot_renders_predictions(model_dir):
+    snapshot = load_snapshot("mmap")
+    assert snapshot.source == "mmap"
+    assert snapshot.feature_list == tuple(FEATURES)
+
+    bodies = snapshot.render_rows(np.zeros((2, 4)))
+    assert len(bodies) == 2
+    assert bodies[0] == snapshot.render_one(np.zeros(4))
+
+
+def test_quantized_snapshot(model_dir):
+    engine = write_model(1)
+    save_quantized(QuantizedEngine.from_engine(engine, "float16"), FEATURES, {"top1_agreement": 1.0})
+
+    snapshot = load_snapshot("quantized")
+    assert snapshot.source == "quantized-float16"
+    assert snapshot.engine.predict(np.ones(4))[0] == engine.predict(np.ones(4))[0]
+
+
+def test_cascade_snapshot_reports_tier(model_dir):
+    fast = InferenceEngine(np.ones((1, 2)), np.zeros(2), ["b", "a"])
+    save_cascade(fast, ["f_pct"], {"metric": "margin", "threshold": 2.0})
+
+    snapshot = load_snapshot("mmap", cascade=True)
+    assert snapshot.source == "mmap+cascade"
+    assert snapshot.score_rows(np.zeros((2, 4)))[3] == ["items", "items"]
+    assert b'"tier":"items"' in snapshot.render_one(np.zeros(4))
+    assert load_snapshot("mmap").score_rows(np.zeros((1, 4)))[3] == [None]
+
+
+def test_reload_swaps_snapshot_atomically(model_dir):
+    store = ModelStore("mmap")
+    swapped = []
+    store.on_swap.append(swapped.append)
+
+    in_flight = store.current
+    write_model(1)
+    new = store.reload()
+
+    assert store.current is new
+    assert new.version != in_flight.version
+    assert swapped == [new]
+
+    # A request holding the old snapshot still scores on the old weights
+    x = np.full(4, 0.5)
+    assert not np.allclose(in_flight.engine.predict_proba(x), new.engine.predict_proba(x))
+
+
+def test_failed_reload_keeps_serving_old_version(model_dir):
+    store = ModelStore("mmap")
+    before = store.current
+
+    write_model(2, features=["g1", "g2", "g3", "g4"])
+    with pytest.raises(ValueError):
+        store.reload()
+
+    assert store.current is before
+    assert store.stats()["failed_reloads"] == 1
+    assert "Feature list" in store.stats()["last_error"]
+
+
+def test_watch_reloads_changed_files(model_dir):
+    store = ModelStore("mmap")
+    before = store.current.version
+    store.watch(0.02)
+
+    time.sleep(0.05)
+    write_model(3)
+
+    deadline = time.time() + 2
+    while store.current.version == before and time.time() < deadline:
+        time.sleep(0.02)
+    assert store.current.version != before
@@ -1,8 +1,10 @@
 import os
+import numpy as np
 import pandas as pd
 import pytest
 
 from prepare_data_48 import run_prepare_data_48
+from util.dataset import read_prepared
 
 
 @pytest.fixture
@@ -41,3 +43,28 @@ def test_prepare_data_48_columns(sample_raw_data_48):
 
     expected_count = 48 + 2  # 48 items + 1 major + 1 major_standard
     assert df_out.shape[1] == expected_count, f"Expected {expected_count} columns"
+
+
+def test_streaming_matches_in_memory(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    majors = ["psychology", "Biology!", "nursing", "biolgy", "computer science", "art history", "zzzz qqq"]
+    n = 300
+    df = pd.DataFrame(rng.integers(1, 6, size=(n, 48)), columns=[f"{c}{i}" for c in "RIASEC" for i in range(1, 9)])
+    df["major"] = rng.choice(majors, size=n, p=[0.3, 0.3, 0.2, 0.1, 0.05, 0.04, 0.01])
+    df.loc[5, "R1"] = None
+    # Duplicates far apart land in different chunks
+    df = pd.concat([df, df.iloc[:40], df.iloc[[7] * 3]], ignore_index=True)
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    df.to_csv("data/data.csv", sep="\t", index=False)
+
+    for ext in ("csv", "npz"):
+        expected = run_prepare_data_48("data/data.csv", f"data/in_memory.{ext}")
+        stats = run_prepare_data_48("data/data.csv", f"data/streamed.{ext}", chunksize=64)
+
+        streamed = read_prepared(f"data/streamed.{ext}")
+        assert stats["rows_read"] == len(df)
+        assert stats["rows_written"] == len(expected) == len(streamed)
+        pd.testing.assert_frame_equal(streamed, read_prepared(f"data/in_memory.{ext}"))
+        assert not os.path.exists(f"data/streamed.{ext}.pass1")
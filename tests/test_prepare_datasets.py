@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prepare_data import dimension_means, run_prepare_data
+from prepare_data_48 import run_prepare_data_48
+from prepare_datasets import run_prepare_datasets
+from util.dataset import read_prepared
+
+ITEMS = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
+
+
+@pytest.fixture
+def raw_data(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 400
+    df = pd.DataFrame(rng.integers(1, 6, size=(n, 48)), columns=ITEMS)
+    df["major"] = rng.choice(["psychology", "Biology!", "nursing", "biolgy", "art history", "zzzz qqq"], n)
+    df.loc[3, "major"] = None
+    # Exact duplicates, and rows whose items differ but whose dimension means do not
+    swapped = df.iloc[20:40].rename(columns={"R1": "R2", "R2": "R1"})
+    df = pd.concat([df, df.iloc[:20], swapped[df.columns]], ignore_index=True)
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    df.to_csv("data/data.csv", sep="\t", index=False)
+    return df
+
+
+def test_single_pass_matches_separate_pipelines(raw_data):
+    items, dimensions = run_prepare_datasets("data/data.csv", "data/items.npz", "data/dimensions.npz")
+
+    expected_items = run_prepare_data_48("data/data.csv", "data/items_48.npz")
+    expected_dimensions = run_prepare_data("data/data.csv", "data/dimensions_6.csv")
+
+    pd.testing.assert_frame_equal(items, expected_items)
+    pd.testing.assert_frame_equal(read_prepared("data/items.npz"), read_prepared("data/items_48.npz"))
+    # Means of 8 quarter steps are multiples of 1/32, so float32 storage is exact
+    pd.testing.assert_frame_equal(read_prepared("data/dimensions.npz"), pd.read_csv("data/dimensions_6.csv"))
+    assert len(dimensions) == len(expected_dimensions) < len(items)
+
+
+def test_dimension_means_reshape_matches_per_dimension_loop():
+    rng = np.random.default_rng(0)
+    items = pd.DataFrame((rng.integers(1, 6, size=(50, 48)) - 1) / 4, columns=ITEMS)
+
+    expected = pd.DataFrame({f"{d}_pct": items[[f"{d}{i}" for i in range(1, 9)]].mean(axis=1) for d in "RIASEC"})
+    pd.testing.assert_frame_equal(dimension_means(items), expected)
+
+    # Uneven item counts fall back to one mean per dimension
+    uneven = items.drop(columns=["R8", "C1", "C2"])
+    assert np.allclose(dimension_means(uneven)["C_pct"], uneven[[f"C{i}" for i in range(3, 9)]].mean(axis=1))
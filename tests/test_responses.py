@@ -0,0 +1,46 @@
+import json
+import pytest
+
+from util import responses
+from util.responses import LabelTable, dumps
+
+
+def as_dict(table, pred, top_idx, top_probs, tier=None):
+    """Reference body LabelTable.render must match once serialized."""
+    content = {
+        "predicted_major": table.names[pred],
+        "top_5_predictions": [
+            {"major": table.names[i], "probability": p}
+            for i, p in zip(top_idx, top_probs)
+        ]
+    }
+    if tier is not None:
+        content["tier"] = tier
+    return content
+
+
+def test_render_matches_dict_serialization():
+    table = LabelTable(["Accounting", "Biology", "Nursing", "Law / Legal Studies", "Art"])
+    top_idx = [2, 0, 4, 1, 3]
+    top_probs = [0.612, 0.2, 0.1, 0.001, 0.0]
+
+    body = table.render(2, top_idx, top_probs)
+    assert body == dumps(as_dict(table, 2, top_idx, top_probs))
+    assert json.loads(body)["predicted_major"] == "Nursing"
+
+    with_row = json.loads(table.render(2, top_idx, top_probs, row=7))
+    assert with_row["row"] == 7
+    assert with_row["top_5_predictions"][0] == {"major": "Nursing", "probability": 0.612}
+
+    with_tier = table.render(2, top_idx, top_probs, "dimensions", row=1)
+    assert json.loads(with_tier) == {"row": 1, **as_dict(table, 2, top_idx, top_probs, "dimensions")}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson not installed")
+
+    assert json.loads(dumps({"a": [1, 0.5, "é"]})) == {"a": [1, 0.5, "é"]}
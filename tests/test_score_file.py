@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from score_file import CHECKPOINT_FILE, part_path, read_scores, score_file
+from util.model_store import load_snapshot
+
+ITEMS = [f"{c}{i}" for c in "RIASEC" for i in range(1, 9)]
+
+
+@pytest.fixture
+def raw_answers(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.integers(1, 6, size=(7, 48)), columns=ITEMS)
+    df.insert(0, "respondent", [f"r{i}" for i in range(7)])
+    df.loc[6, "R1"] = 9  # out of range
+    path = tmp_path / "data.csv"
+    df.to_csv(path, sep="\t", index=False)
+    return path, df
+
+
+def expected_predictions(df):
+    snapshot = load_snapshot()
+    x = (df[list(snapshot.feature_list)].to_numpy(dtype=float) - 1) / 4
+    preds = snapshot.score_rows(x)[0]
+    return [snapshot.labels.names[p] for p in preds]
+
+
+def test_score_file_matches_api_predictions(raw_answers, tmp_path):
+    path, df = raw_answers
+    output = str(tmp_path / "scores.out")
+
+    summary = score_file(str(path), output, workers=1, chunk_rows=3, id_column="respondent")
+    assert summary["rows"] == 7
+    assert summary["errors"] == 1
+    assert not os.path.exists(output + ".parts")
+
+    result = read_scores(output)
+    assert result["row"].tolist() == list(range(7))
+    assert result["id"].tolist() == df["respondent"].tolist()
+    assert result["predicted_major"][:6].tolist() == expected_predictions(df)[:6]
+    assert result["predicted_major"].isna().tolist() == [False] * 6 + [True]
+    assert result["error"].notna().tolist() == [False] * 6 + [True]
+    assert (result["top1_major"][:6] == result["predicted_major"][:6]).all()
+
+
+def test_score_file_resumes_missing_chunks(raw_answers, tmp_path):
+    path, df = raw_answers
+    output = str(tmp_path / "scores.out")
+    parts_dir = output + ".parts"
+
+    score_file(str(path), output, workers=1, chunk_rows=3, keep_parts=True)
+    first = read_scores(output)
+
+    # Simulate an interruption before chunk 1 was written
+    os.remove(part_path(parts_dir, 1))
+    checkpoint_path = os.path.join(parts_dir, CHECKPOINT_FILE)
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    del checkpoint["done"]["1"]
+    with open(checkpoint_path, "w") as f:
+        json.dump(checkpoint, f)
+
+    summary = score_file(str(path), output, workers=1, chunk_rows=3)
+    assert summary["scored_rows"] == 3
+    pd.testing.assert_frame_equal(read_scores(output), first)
+
+
+def test_score_file_process_pool(raw_answers, tmp_path):
+    path, df = raw_answers
+    output = str(tmp_path / "scores.out")
+
+    summary = score_file(str(path), output, workers=2, chunk_rows=2)
+    assert summary["rows"] == 7
+    assert read_scores(output)["predicted_major"][:6].tolist() == expected_predictions(df)[:6]
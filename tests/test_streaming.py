@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+import pytest
+
+from util.streaming import iter_lines, csv_columns, parse_csv_rows, parse_ndjson_rows
+
+
+async def chunked(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_iter_lines_reassembles_split_chunks(size):
+    data = b"a,b\r\n1,2\n\n3,4"
+    assert collect(iter_lines(chunked(data, size))) == [b"a,b", b"1,2", b"3,4"]
+
+
+def test_csv_columns_maps_header():
+    columns, n = csv_columns(b"id,F2,F1", ["F1", "F2"])
+    assert columns == [2, 1]
+    assert n == 3
+
+    with pytest.raises(ValueError):
+        csv_columns(b"id,F1", ["F1", "F2"])
+
+
+def test_parse_csv_rows_reports_bad_rows():
+    x, errors = parse_csv_rows([b"a,0.5,1", b"b,oops,1", b"c,1"], columns=[1, 2], n_columns=3)
+    assert x[0].tolist() == [0.5, 1.0]
+    assert errors[0] is None
+    assert "Non-numeric" in errors[1]
+    assert "columns" in errors[2]
+
+
+def test_parse_ndjson_rows():
+    x, errors = parse_ndjson_rows([b'{"features": [0.1, 0.2]}', b"[0.3, 0.4]", b"{bad", b"[1]"], 2)
+    assert x[:2].tolist() == [[0.1, 0.2], [0.3, 0.4]]
+    assert errors[:2] == [None, None]
+    assert errors[2] == "Invalid JSON row"
+    assert "Expected 2" in errors[3]
+    assert np.isnan(x[3]).all()
@@ -120,3 +120,31 @@ def test_items_dictionary_valid():
     assert len(app.ITEMS) == 48
     assert "R1" in app.ITEMS
     assert "C8" in app.ITEMS
+
+
+# -------------------- NUMPY PATH / APP RUN TESTS --------------------
+
+def test_predict_top5_array_matches_sklearn_path():
+    app = reload_app()
+    model, encoder = app.load_model(), app.load_encoder()
+    answers = np.array([1, 2, 3, 4, 5, 3] * 8)
+
+    expected_labels, expected_probs = app.predict_top5(
+        model, encoder, (pd.DataFrame([answers], columns=list(app.ITEMS)) - 1) / 4
+    )
+    labels, probs = app.predict_top5_array(app.load_engine(), answers)
+
+    assert list(labels) == list(expected_labels)
+    assert np.allclose(probs, expected_probs)
+
+
+def test_app_shows_live_top5():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string("import streamlit_app\nstreamlit_app.run_app()", default_timeout=30).run()
+    assert not at.exception
+    assert len(at.slider) == 48
+    assert not any("%" in m.value for m in at.markdown)
+
+    at.toggle[0].set_value(True).run()
+    assert sum("%" in m.value for m in at.markdown) == 5
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from util.validation import validate_features, valid_rows, decode_float32, decode_likert
+
+
+def test_validate_features_accepts_in_range():
+    x = np.linspace(0, 1, 48)
+    assert validate_features(x, 48) is x
+
+
+@pytest.mark.parametrize("x", [
+    np.zeros(47),
+    np.full(48, 1.5),
+    np.full(48, -0.1),
+    np.array([np.nan] + [0.0] * 47),
+])
+def test_validate_features_rejects(x):
+    with pytest.raises(ValueError):
+        validate_features(x, 48)
+
+
+def test_valid_rows_mask():
+    x = np.array([[0.0, 1.0], [0.5, 2.0], [np.inf, 0.1]])
+    assert valid_rows(x).tolist() == [True, False, False]
+
+
+def test_decode_float32_roundtrip():
+    x = np.linspace(0, 1, 48, dtype="<f4")
+    decoded = decode_float32(x.tobytes(), 48)
+    assert decoded.dtype == np.float64
+    assert np.array_equal(decoded, x.astype(np.float64))
+
+    with pytest.raises(ValueError):
+        decode_float32(x.tobytes()[:-4], 48)
+
+
+def test_decode_likert_normalizes():
+    raw = np.array([1, 3, 5] * 16, dtype=np.uint8)
+    decoded = decode_likert(raw.tobytes(), 48)
+    assert decoded[:3].tolist() == [0.0, 0.5, 1.0]
+
+    with pytest.raises(ValueError):
+        decode_likert(bytes([0] * 48), 48)
+    with pytest.raises(ValueError):
+        decode_likert(bytes([3] * 40), 48)
@@ -1,5 +1,8 @@
 # train_model.py
+import argparse
+import numpy as np
 import pandas as pd
+import os
 import pickle
 import json
 import time
@@ -8,40 +11,185 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.linear_model import LogisticRegression
 
 from util.logger import get_logger
+from util.inference import InferenceEngine, QuantizedEngine, QUANTIZED_DTYPES
+from util.artifacts import (
+    BUNDLE_PATH, SHARED_PATH, QUANTIZED_PATH, CASCADE_PATH,
+    save_bundle, save_shared, save_quantized, save_cascade, load_pickle_artifacts,
+)
+from util.cascade import Cascade, CASCADE_METRICS, DEFAULT_TARGET_AGREEMENT, calibrate
+from util.dataset import load_prepared
+from util.model_store import DEFAULT_MIN_AGREEMENT
 
 logger = get_logger(__name__, log_file="train_model.log")
 
-DATA_PATH = "data/final_data_48.csv"
+# Columnar outputs of the prep scripts; the CSVs are still read when they are all there is
+DATA_PATH = "data/final_data_48.npz"
+CSV_DATA_PATH = "data/final_data_48.csv"
+DIMENSIONS_DATA_PATH = "data/final_data.npz"
+CSV_DIMENSIONS_DATA_PATH = "data/final_data.csv"
 MODEL_PATH = "model/logreg_model.pkl"
 ENCODER_PATH = "model/label_encoder.pkl"
 FEATURES_PATH = "model/feature_list.json"
 
 
-def main():
+def export_bundle(model, encoder, feature_cols):
+    """Write the pickle-free artifacts (weights, bias, classes, features) served by app.py."""
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    engine.verify_against(model)
+    save_bundle(engine, feature_cols)
+    logger.info(f"Plain-array model bundle saved to {BUNDLE_PATH}")
+
+    save_shared(engine, feature_cols)
+    logger.info(f"Memory-mappable model file saved to {SHARED_PATH}")
+
+
+def dataset_path(path=None, csv_path=None):
+    path, csv_path = path or DATA_PATH, csv_path or CSV_DATA_PATH
+    return path if os.path.exists(path) or not os.path.exists(csv_path) else csv_path
+
+
+def encode_labels(encoder, labels, classes):
+    """Label codes over `classes` -> codes over encoder.classes_ (-1 where unknown)."""
+    known = np.isin(classes, encoder.classes_)
+    mapping = np.full(len(classes), -1)
+    mapping[known] = encoder.transform(classes[known])
+    return mapping[labels]
+
+
+def held_out_split(encoder, feature_cols):
+    """
+    The test split main() evaluates on, rebuilt from DATA_PATH. Without the
+    dataset, Likert-grid answers stand in so --export-only still works.
+    """
+    try:
+        x, labels, classes, names = load_prepared(dataset_path())
+        y_enc = encode_labels(encoder, labels, classes)
+        if (y_enc < 0).any():
+            raise ValueError("dataset has classes the encoder does not know")
+        x = x[:, [names.index(c) for c in feature_cols]]
+        _, x_test, _, _ = train_test_split(x, y_enc, test_size=0.2, random_state=42, stratify=y_enc)
+        return x_test, "held-out split"
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Held-out split unavailable ({e}); comparing on synthetic answers")
+        answers = np.random.default_rng(0).integers(1, 6, size=(20_000, len(feature_cols)))
+        return (answers - 1) / 4, "synthetic Likert answers"
+
+
+def rows_per_second(engine, x, min_rows=200_000, repeats=3):
+    """Best-of-N batch scoring throughput on x tiled to at least min_rows."""
+    batch = np.tile(x, (max(1, -(-min_rows // len(x))), 1))
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.predict(batch)
+        best = min(best, time.perf_counter() - start)
+    return len(batch) / best
+
+
+def export_quantized(model, encoder, feature_cols, x_eval, dtype, eval_source="held-out split"):
+    """Quantize the weights, compare with the float64 model on x_eval and save both together."""
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    quantized = QuantizedEngine.from_engine(engine, dtype)
+
+    report = quantized.agreement(engine, x_eval)
+    float_rps = rows_per_second(engine, x_eval)
+    quantized_rps = rows_per_second(quantized, x_eval)
+    report.update({
+        "dtype": dtype,
+        "evaluated_on": eval_source,
+        "float64_rows_per_second": round(float_rps),
+        "quantized_rows_per_second": round(quantized_rps),
+        "speedup": round(quantized_rps / float_rps, 2),
+        "weights_bytes": {"float64": engine.weights.nbytes, dtype: quantized.weights.nbytes},
+    })
+    save_quantized(quantized, feature_cols, report)
+
+    logger.info(
+        f"{dtype} weights saved to {QUANTIZED_PATH} — top-1 agreement={report['top1_agreement']:.4f}, "
+        f"top-5 agreement={report['top5_agreement']:.4f}, max prob diff={report['max_prob_diff']:.2e}, "
+        f"{report['speedup']}x rows/s ({report['quantized_rows_per_second']} vs {report['float64_rows_per_second']})"
+    )
+    if report["top1_agreement"] < DEFAULT_MIN_AGREEMENT:
+        logger.warning(
+            f"Top-1 agreement is below {DEFAULT_MIN_AGREEMENT}; the API will refuse these weights "
+            f"unless QUANTIZED_MIN_AGREEMENT is lowered"
+        )
+    return report
+
+
+def train_dimensions(encoder, full_engine, feature_cols, x_eval, metric="margin",
+                     target_agreement=DEFAULT_TARGET_AGREEMENT):
+    """
+    Train the 6-dimension model on prepare_data.py's R_pct..C_pct dataset, then
+    calibrate its cascade threshold against the 48-item model on x_eval.
+    """
+    x, labels, classes, dimension_cols = load_prepared(dataset_path(DIMENSIONS_DATA_PATH, CSV_DIMENSIONS_DATA_PATH))
+    logger.info(f"Dimension dataset loaded — rows={len(x)}, features={dimension_cols}")
+
+    # Same label space as the 48-item model so both tiers share class indices
+    y_enc = encode_labels(encoder, labels, classes)
+    known = y_enc >= 0
+    if not known.all():
+        logger.warning(f"Dropping {int((~known).sum())} rows with majors the 48-item model does not know")
+        x, y_enc = x[known], y_enc[known]
+
+    x_train, _, y_train, _ = train_test_split(x, y_enc, test_size=0.2, random_state=42, stratify=y_enc)
+    model = LogisticRegression(multi_class="multinomial", solver="lbfgs", max_iter=500)
+    model.fit(pd.DataFrame(x_train, columns=dimension_cols), y_train)
+    logger.info("6-dimension model training completed")
+
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    engine.verify_against(model)
+
+    cascade = Cascade(engine, feature_cols, dimension_cols, metric, 0.0, full_engine.classes)
+    threshold, report = calibrate(cascade, full_engine, x_eval, target_agreement)
+
+    # Measured end to end as well as estimated from multiply-adds
+    cascade = Cascade(engine, feature_cols, dimension_cols, metric, threshold, full_engine.classes)
+    batch = np.tile(x_eval, (max(1, -(-200_000 // len(x_eval))), 1))
+    start = time.perf_counter()
+    full_engine.predict(batch)
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    cascade.predict(batch, full_engine)
+    report["measured_throughput_ratio"] = round(full_seconds / (time.perf_counter() - start), 2)
+
+    save_cascade(engine, dimension_cols, {"metric": metric, "threshold": threshold, "report": report})
+    chosen = report["chosen"]
+    logger.info(
+        f"6-dimension tier saved to {CASCADE_PATH} — {metric} threshold={threshold:.4f}: "
+        f"answers {chosen['dimensions_share']:.1%} of rows, agreement={chosen['agreement']:.4f}, "
+        f"relative cost={chosen['relative_cost']:.2f} (measured throughput {report['measured_throughput_ratio']}x); "
+        f"6-dimension model alone agrees on {report['dimensions_alone_agreement']:.1%}"
+    )
+    return report
+
+
+def main(quantize=None, dimensions=False, cascade_metric="margin", target_agreement=DEFAULT_TARGET_AGREEMENT):
 
     logger.info("==== Starting model training pipeline ====")
     start_time = time.time()
 
     # Load dataset
     try:
-        logger.info(f"Loading dataset from {DATA_PATH}")
-        df = pd.read_csv(DATA_PATH)
-        logger.info(f"Dataset loaded successfully — rows={len(df)}, cols={len(df.columns)}")
+        data_path = dataset_path()
+        logger.info(f"Loading dataset from {data_path}")
+        x, labels, classes, feature_cols = load_prepared(data_path)
+        logger.info(f"Dataset loaded successfully — rows={len(x)}, features={len(feature_cols)}")
     except Exception as e:
         logger.exception(f"Failed to load dataset: {e}")
         return
 
     # Select features
-    feature_cols = [c for c in df.columns if c.startswith(tuple("RIASEC"))]
+    selected = [i for i, c in enumerate(feature_cols) if c.startswith(tuple("RIASEC"))]
+    feature_cols = [feature_cols[i] for i in selected]
+    x = x[:, selected]
     logger.info(f"Detected {len(feature_cols)} RIASEC features")
 
-    x = df[feature_cols]
-    y = df["major_standard"]
-
-    # Encode labels
+    # Encode labels: the dataset is already integer-coded, so only the class names go through the encoder
     try:
-        encoder = LabelEncoder()
-        y_enc = encoder.fit_transform(y)
+        encoder = LabelEncoder().fit(classes)
+        y_enc = encode_labels(encoder, labels, classes)
         logger.info(f"Label encoding complete — classes={len(encoder.classes_)}")
     except Exception as e:
         logger.exception(f"Label encoding failed: {e}")
@@ -65,7 +213,8 @@ def main():
             solver="lbfgs",
             max_iter=500
         )
-        model.fit(x_train, y_train)
+        # Fitted on a frame so the pickled model keeps feature_names_in_ as before
+        model.fit(pd.DataFrame(x_train, columns=feature_cols), y_train)
         logger.info("Model training completed successfully")
     except Exception as e:
         logger.exception(f"Model training failed: {e}")
@@ -85,13 +234,57 @@ def main():
             json.dump(feature_cols, f)
         logger.info(f"Feature list saved to {FEATURES_PATH}")
 
+        export_bundle(model, encoder, feature_cols)
+        if quantize:
+            export_quantized(model, encoder, feature_cols, x_test, quantize)
+
     except Exception as e:
         logger.exception(f"Saving model artifacts failed: {e}")
         return
 
+    # Optional first tier for CASCADE=1
+    if dimensions:
+        try:
+            full_engine = InferenceEngine.from_sklearn(model, encoder)
+            train_dimensions(encoder, full_engine, feature_cols, x_test,
+                             cascade_metric, target_agreement)
+        except Exception as e:
+            logger.exception(f"6-dimension model training failed: {e}")
+            return
+
     elapsed = round(time.time() - start_time, 2)
     logger.info(f"==== Training pipeline completed in {elapsed} seconds ====")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the RIASEC major classifier.")
+    parser.add_argument(
+        "--export-only", action="store_true",
+        help="Skip training and convert the existing pickled artifacts into the plain-array bundle.",
+    )
+    parser.add_argument(
+        "--quantize", choices=QUANTIZED_DTYPES,
+        help="Also export int8 (per-class scale) or float16 weights for MODEL_FORMAT=quantized.",
+    )
+    parser.add_argument(
+        "--dimensions", action="store_true",
+        help=f"Also train the 6-dimension model on {DIMENSIONS_DATA_PATH} as the first tier for CASCADE=1.",
+    )
+    parser.add_argument("--cascade-metric", choices=CASCADE_METRICS, default="margin")
+    parser.add_argument(
+        "--target-agreement", type=float, default=DEFAULT_TARGET_AGREEMENT,
+        help="Share of cascade answers that must match the 48-item model on the held-out split.",
+    )
+    args = parser.parse_args()
+
+    if args.export_only:
+        engine, features, model, encoder = load_pickle_artifacts()
+        export_bundle(model, encoder, features)
+        if args.quantize or args.dimensions:
+            x_eval, source = held_out_split(encoder, features)
+        if args.quantize:
+            export_quantized(model, encoder, features, x_eval, args.quantize, source)
+        if args.dimensions:
+            train_dimensions(encoder, engine, features, x_eval, args.cascade_metric, args.target_agreement)
+    else:
+        main(args.quantize, args.dimensions, args.cascade_metric, args.target_agreement)
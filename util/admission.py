@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+import itertools
+import math
+
+from util.metrics import set_route_label
+from util.responses import dumps
+
+# Lower value is served first
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded, prioritized wait queue. Requests that
+    find the queue full, or wait longer than `timeout` seconds, are shed.
+    Bulk requests may use at most `bulk_concurrency` slots so interactive
+    ones always have headroom, and queued interactive requests go first.
+    Runs on the event loop; not thread-safe.
+    """
+
+    def __init__(self, max_concurrency=64, max_queue=256, timeout=1.0, bulk_concurrency=None):
+        self.max_concurrency = max_concurrency
+        self.bulk_concurrency = bulk_concurrency or max(1, max_concurrency // 2)
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self.active = {INTERACTIVE: 0, BULK: 0}
+        self.queued = {INTERACTIVE: 0, BULK: 0}
+        self._waiters = []
+        self._seq = itertools.count()
+
+        self.admitted = {INTERACTIVE: 0, BULK: 0}
+        self.shed = {(p, reason): 0 for p in PRIORITY_NAMES for reason in ("queue_full", "timeout")}
+
+    @property
+    def retry_after(self):
+        """Seconds a shed client should wait before retrying."""
+        return max(1, math.ceil(self.timeout))
+
+    def _has_slot(self, priority):
+        if sum(self.active.values()) >= self.max_concurrency:
+            return False
+        return priority != BULK or self.active[BULK] < self.bulk_concurrency
+
+    def _queued_ahead(self, priority):
+        return any(self.queued[p] for p in self.queued if p <= priority)
+
+    async def acquire(self, priority=INTERACTIVE):
+        """Wait for a slot. Returns False when the request should be shed."""
+        if self._has_slot(priority) and not self._queued_ahead(priority):
+            self.active[priority] += 1
+            self.admitted[priority] += 1
+            return True
+
+        if sum(self.queued.values()) >= self.max_queue:
+            self.shed[priority, "queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        self.queued[priority] += 1
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self.queued[priority] -= 1
+            self.shed[priority, "timeout"] += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away; give back the slot if it was granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)
+            else:
+                self.queued[priority] -= 1
+            raise
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, priority=INTERACTIVE):
+        self.active[priority] -= 1
+        self._grant()
+
+    def _grant(self):
+        """Hand free slots to queued requests, highest priority first."""
+        while self._waiters:
+            priority, _, waiter = self._waiters[0]
+            if waiter.done():  # timed out
+                heapq.heappop(self._waiters)
+                continue
+            if not self._has_slot(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.queued[priority] -= 1
+            self.active[priority] += 1
+            waiter.set_result(True)
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "bulk_concurrency": self.bulk_concurrency,
+            "max_queue": self.max_queue,
+            "timeout_ms": round(self.timeout * 1000, 1),
+            **{
+                name: {
+                    "active": self.active[p],
+                    "queued": self.queued[p],
+                    "admitted": self.admitted[p],
+                    "shed": {reason: n for (q, reason), n in self.shed.items() if q == p},
+                }
+                for p, name in PRIORITY_NAMES.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Raw ASGI middleware applying an AdmissionController to the paths in
+    `priorities` ({path: INTERACTIVE or BULK}); shed requests get 503 with
+    Retry-After before any body is read. Other paths pass straight through.
+    """
+
+    def __init__(self, app, controller, priorities):
+        self.app = app
+        self.controller = controller
+        self.priorities = priorities
+
+    async def __call__(self, scope, receive, send):
+        priority = self.priorities.get(scope["path"]) if scope["type"] == "http" else None
+        if priority is None:
+            return await self.app(scope, receive, send)
+
+        if not await self.controller.acquire(priority):
+            set_route_label(scope, scope["path"])
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(self.controller.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": dumps({"detail": "Server is overloaded, retry later."})})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from util.inference import InferenceEngine, QuantizedEngine
+
+MODEL_PATH = "model/logreg_model.pkl"
+ENCODER_PATH = "model/label_encoder.pkl"
+FEATURES_PATH = "model/feature_list.json"
+
+# Pickle-free bundle: arrays in .npz, everything else in JSON
+BUNDLE_PATH = "model/model_bundle.npz"
+BUNDLE_META_PATH = "model/model_bundle.json"
+BUNDLE_FORMAT = 1
+
+# Single flat file for MODEL_FORMAT=mmap: every worker maps the same pages
+SHARED_PATH = "model/model_shared.bin"
+SHARED_MAGIC = b"RIASECW1"
+SHARED_ALIGN = 64
+
+
+# Quantized weights written by `train_model.py --quantize`, served with MODEL_FORMAT=quantized
+QUANTIZED_PATH = "model/model_quantized.npz"
+QUANTIZED_META_PATH = "model/model_quantized.json"
+
+
+# Optional 6-dimension first tier (R_pct..C_pct) written by `train_model.py --dimensions`
+CASCADE_PATH = "model/model_dimensions.npz"
+CASCADE_META_PATH = "model/model_dimensions.json"
+
+
+def fingerprint(paths, length=12):
+    """Short content hash identifying a set of artifact files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:length]
+
+
+def artifact_paths(model_format="auto", cascade=False):
+    """Files that make up the model served for a MODEL_FORMAT value (plus the first tier)."""
+    if cascade:
+        return artifact_paths(model_format) + [CASCADE_PATH, CASCADE_META_PATH]
+    if model_format == "mmap":
+        return [SHARED_PATH]
+    if model_format == "quantized":
+        return [QUANTIZED_PATH, QUANTIZED_META_PATH]
+    if model_format != "pickle" and bundle_exists():
+        return [BUNDLE_PATH, BUNDLE_META_PATH]
+    return [MODEL_PATH, ENCODER_PATH, FEATURES_PATH]
+
+
+def bundle_exists(npz_path=BUNDLE_PATH, meta_path=BUNDLE_META_PATH):
+    return os.path.exists(npz_path) and os.path.exists(meta_path)
+
+
+def _write_meta(engine, feature_list, meta_path, **extra):
+    """Self-describing JSON header of a bundle-format .npz; extra keys go last."""
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "model": "multinomial_logistic_regression",
+        "n_features": engine.n_features,
+        "n_classes": engine.n_classes,
+        "dtype": str(engine.weights.dtype),
+        "classes": [str(c) for c in engine.classes],
+        "feature_list": list(feature_list),
+        "weights_sha256": hashlib.sha256(engine.weights.tobytes()).hexdigest(),
+        **extra,
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def _read_verified(npz_path, meta_path, kind="Bundle", check=None):
+    """
+    Header and arrays of a bundle-format pair -> (arrays, meta), after checking
+    the format, the weight checksum and the feature list. check(meta) runs
+    before the arrays are read.
+    """
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    if meta.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {meta.get('format')}")
+    if check is not None:
+        check(meta)
+
+    with np.load(npz_path, allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+
+    if hashlib.sha256(arrays["weights"].tobytes()).hexdigest() != meta["weights_sha256"]:
+        raise ValueError(f"{kind} weights do not match their checksum")
+    if arrays["weights"].shape[0] != len(meta["feature_list"]):
+        raise ValueError("Feature list does not match the weight matrix")
+    return arrays, meta
+
+
+def save_bundle(engine, feature_list, npz_path=BUNDLE_PATH, meta_path=BUNDLE_META_PATH):
+    """Write weights/bias as plain arrays plus a self-describing JSON header."""
+    if len(feature_list) != engine.n_features:
+        raise ValueError("Feature list does not match the weight matrix")
+
+    np.savez(npz_path, weights=engine.weights, bias=engine.bias)
+    return _write_meta(engine, feature_list, meta_path)
+
+
+def load_bundle(npz_path=BUNDLE_PATH, meta_path=BUNDLE_META_PATH):
+    """Load a bundle written by save_bundle -> (engine, feature_list, meta)."""
+    arrays, meta = _read_verified(npz_path, meta_path)
+    engine = InferenceEngine(arrays["weights"], arrays["bias"], meta["classes"])
+    return engine, meta["feature_list"], meta
+
+
+def save_quantized(engine, feature_list, report, npz_path=QUANTIZED_PATH, meta_path=QUANTIZED_META_PATH):
+    """Write a QuantizedEngine plus the agreement report it was accepted with."""
+    if len(feature_list) != engine.n_features:
+        raise ValueError("Feature list does not match the weight matrix")
+
+    arrays = {"weights": engine.weights, "bias": engine.bias}
+    if engine.scales is not None:
+        arrays["scales"] = engine.scales
+    np.savez(npz_path, **arrays)
+    return _write_meta(engine, feature_list, meta_path, report=report)
+
+
+def load_quantized(npz_path=QUANTIZED_PATH, meta_path=QUANTIZED_META_PATH, min_agreement=None):
+    """
+    Load weights written by save_quantized -> (engine, feature_list, meta).
+    With min_agreement set, refuse weights whose recorded top-1 agreement
+    with the float64 model is lower.
+    """
+    def check_agreement(meta):
+        agreement = meta.get("report", {}).get("top1_agreement")
+        if agreement is None or agreement < min_agreement:
+            raise ValueError(
+                f"Quantized model top-1 agreement {agreement} is below the required {min_agreement}"
+            )
+
+    arrays, meta = _read_verified(
+        npz_path, meta_path, "Quantized", check_agreement if min_agreement is not None else None,
+    )
+    engine = QuantizedEngine(arrays["weights"], arrays.get("scales"), arrays["bias"], meta["classes"])
+    return engine, meta["feature_list"], meta
+
+
+def save_cascade(engine, feature_list, calibration, npz_path=CASCADE_PATH, meta_path=CASCADE_META_PATH):
+    """Write the 6-dimension model as a bundle whose header also carries its calibration."""
+    meta = save_bundle(engine, feature_list, npz_path, meta_path)
+    meta["cascade"] = calibration
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_cascade(npz_path=CASCADE_PATH, meta_path=CASCADE_META_PATH):
+    """Load a first tier written by save_cascade -> (engine, feature_list, calibration)."""
+    engine, feature_list, meta = load_bundle(npz_path, meta_path)
+    if "cascade" not in meta:
+        raise ValueError(f"{meta_path} has no cascade calibration")
+    return engine, feature_list, meta["cascade"]
+
+
+def _align(n):
+    return (n + SHARED_ALIGN - 1) // SHARED_ALIGN * SHARED_ALIGN
+
+
+def save_shared(engine, feature_list, path=SHARED_PATH):
+    """
+    Write weights, bias and the class table into one flat file:
+    magic, header length (uint64), JSON header, then 64-byte aligned arrays.
+    Array offsets in the header are relative to the start of the data section.
+    """
+    weights = np.ascontiguousarray(engine.weights, dtype="<f8")
+    bias = np.ascontiguousarray(engine.bias, dtype="<f8")
+    encoded = [str(c).encode("utf-8") for c in engine.classes]
+    classes = np.array(encoded, dtype=f"S{max(map(len, encoded))}")
+
+    header = {
+        "format": BUNDLE_FORMAT,
+        "n_features": engine.n_features,
+        "n_classes": engine.n_classes,
+        "feature_list": list(feature_list),
+        "weights": {"offset": 0, "dtype": "<f8", "shape": list(weights.shape)},
+        "bias": {"offset": _align(weights.nbytes), "dtype": "<f8", "shape": list(bias.shape)},
+        "classes": {
+            "offset": _align(weights.nbytes) + _align(bias.nbytes),
+            "dtype": classes.dtype.str, "shape": list(classes.shape),
+        },
+        "weights_sha256": hashlib.sha256(weights.tobytes()).hexdigest(),
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(SHARED_MAGIC) + 8 + len(header_bytes))
+
+    # Write a new inode and rename it into place: workers still mapping the
+    # old file keep their pages instead of seeing it change underneath them
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SHARED_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in (("weights", weights), ("bias", bias), ("classes", classes)):
+            f.seek(data_start + header[name]["offset"])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+    return header
+
+
+def load_shared(path=SHARED_PATH, verify=True):
+    """
+    Memory-map a file written by save_shared read-only -> (engine, feature_list, header).
+    The weight matrix and bias stay backed by the OS page cache, so every
+    process mapping the file shares the same physical pages. The class names
+    are small and decoded into each process, as the response renderer needs
+    its own pre-encoded strings anyway.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(SHARED_MAGIC)) != SHARED_MAGIC:
+            raise ValueError(f"{path} is not a shared model file")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len))
+    if header.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {header.get('format')}")
+
+    data_start = _align(len(SHARED_MAGIC) + 8 + header_len)
+
+    def mapped(name):
+        spec = header[name]
+        return np.memmap(
+            path, mode="r", dtype=spec["dtype"], shape=tuple(spec["shape"]),
+            offset=data_start + spec["offset"],
+        )
+
+    weights, bias = mapped("weights"), mapped("bias")
+    if verify and hashlib.sha256(weights).hexdigest() != header["weights_sha256"]:
+        raise ValueError("Shared weights do not match their checksum")
+
+    classes = [c.decode("utf-8") for c in mapped("classes")]
+    engine = InferenceEngine(weights, bias, classes)
+    return engine, header["feature_list"], header
+
+
+def load_pickle_artifacts(model_path=MODEL_PATH, encoder_path=ENCODER_PATH, features_path=FEATURES_PATH):
+    """
+    Fallback loader for the pickled sklearn objects (imports sklearn).
+    Returns (engine, feature_list, model, encoder); the engine is verified against the model.
+    """
+    import pickle
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+
+    with open(encoder_path, "rb") as f:
+        encoder = pickle.load(f)
+
+    with open(features_path, "r") as f:
+        feature_list = json.load(f)
+
+    engine = InferenceEngine.from_sklearn(model, encoder)
+    engine.verify_against(model)
+    return engine, feature_list, model, encoder
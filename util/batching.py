@@ -0,0 +1,117 @@
+import asyncio
+import time
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-row requests into one batched inference call.
+
+    A batch is flushed when it reaches max_batch_size or when window_ms has
+    passed since its first row. When traffic is light (the previous batch held
+    a single row and nothing else is queued) the window is skipped so lone
+    requests are not delayed.
+
+    Each request carries a context (e.g. the model snapshot it pinned) and is
+    only ever scored together with requests holding the same context object.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, window_ms=2.0):
+        # score_fn: ((n, n_features) array, context) -> list of n results
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._last_batch_size = 1
+
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def submit(self, x, context=None):
+        """Queue one feature vector and wait for its result, scored under `context`."""
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+
+        future = loop.create_future()
+        self._queue.put_nowait((x, context, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self, loop):
+        # A new event loop (e.g. a fresh TestClient portal) needs its own worker
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0 or (len(batch) == 1 and self._last_batch_size == 1):
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        now = time.perf_counter()
+        waits = [now - queued_at for *_, queued_at in batch]
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.queue_wait_total += sum(waits)
+        self.queue_wait_max = max(self.queue_wait_max, max(waits))
+        self._last_batch_size = len(batch)
+
+        # Requests queued across a model swap are scored by the model they pinned
+        groups = []
+        for item in batch:
+            for context, items in groups:
+                if context is item[1]:
+                    items.append(item)
+                    break
+            else:
+                groups.append((item[1], [item]))
+
+        for context, items in groups:
+            self._score(items, context)
+
+    def _score(self, items, context):
+        try:
+            results = self.score_fn(np.stack([x for x, *_ in items]), context)
+        except Exception as e:
+            for _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "max_batch_size": self.largest_batch,
+            "queue_wait_ms_mean": round(1000 * self.queue_wait_total / self.requests, 3) if self.requests else 0.0,
+            "queue_wait_ms_max": round(1000 * self.queue_wait_max, 3),
+        }
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Slider answers (1–5) normalize to multiples of 1/4
+LIKERT_STEPS = 4
+
+
+def quantize_key(x):
+    """
+    Cache key for a feature vector. Vectors on the Likert grid pack into one
+    byte per item; anything else falls back to its exact float64 bytes.
+    """
+    scaled = x * LIKERT_STEPS
+    codes = np.rint(scaled)
+    if np.array_equal(codes, scaled):
+        return codes.astype(np.uint8).tobytes()
+    return x.astype("<f8").tobytes()
+
+
+class ResultCache:
+    """Bounded LRU cache of encoded responses, cleared when the model version changes."""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def bind(self, version):
+        """Attach the cache to a model version, dropping entries from any other version."""
+        with self._lock:
+            if version != self.version:
+                if self._data:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def get(self, key, version=None):
+        """Cached result, or None. With a version, entries bound to any other version never match."""
+        with self._lock:
+            value = self._data.get(key) if version is None or version == self.version else None
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store a result; results computed by a model version other than the bound one are dropped."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "model_version": self.version,
+        }
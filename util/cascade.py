@@ -0,0 +1,180 @@
+import threading
+
+import numpy as np
+
+from util.inference import InferenceEngine
+
+# Names reported in responses for the tier that produced a prediction
+TIER_DIMENSIONS = "dimensions"
+TIER_ITEMS = "items"
+
+# Confidence of the 6-dimension model: top-1 minus top-2 probability, or entropy
+CASCADE_METRICS = ("margin", "entropy")
+
+# Fraction of predictions that must match the 48-item model when calibrating
+DEFAULT_TARGET_AGREEMENT = 0.97
+
+
+def pooling_matrix(item_features, dimension_features):
+    """
+    (n_items, n_dimensions) matrix turning item answers into per-dimension means,
+    e.g. R1..R8 -> R_pct, the same reduction prepare_data.py applies.
+    """
+    index = {name.split("_")[0]: j for j, name in enumerate(dimension_features)}
+    pool = np.zeros((len(item_features), len(dimension_features)))
+    for i, name in enumerate(item_features):
+        pool[i, index[name[0]]] = 1.0
+    counts = pool.sum(axis=0)
+    if not counts.all():
+        raise ValueError("Every dimension needs at least one item feature")
+    return pool / counts
+
+
+def align_classes(engine, classes):
+    """
+    Re-index an engine onto a wider class list. Classes the engine never saw
+    get -inf logits, so their probability is exactly zero.
+    """
+    position = {str(c): j for j, c in enumerate(classes)}
+    missing = [c for c in engine.classes if str(c) not in position]
+    if missing:
+        raise ValueError(f"Classes unknown to the 48-item model: {', '.join(map(str, missing[:5]))}")
+
+    columns = [position[str(c)] for c in engine.classes]
+    weights = np.zeros((engine.n_features, len(classes)))
+    bias = np.full(len(classes), -np.inf)
+    weights[:, columns] = engine.weights
+    bias[columns] = engine.bias
+    return InferenceEngine(weights, bias, classes)
+
+
+def confidence(probas, metric):
+    """Higher is more confident: the top-1 margin, or negated entropy."""
+    if metric == "margin":
+        top2 = np.partition(probas, -2, axis=-1)[..., -2:]
+        return top2[..., 1] - top2[..., 0]
+    if metric == "entropy":
+        p = np.clip(probas, 1e-300, 1.0)
+        return (probas * np.log(p)).sum(axis=-1)
+    raise ValueError(f"Unknown cascade metric: {metric} (expected one of {CASCADE_METRICS})")
+
+
+def to_threshold(value, metric):
+    """Confidence cut-off -> threshold in the metric's own units (entropy is not negated)."""
+    return float(value) if metric == "margin" else float(-value)
+
+
+class Cascade:
+    """
+    Scores the 6-dimension model first and keeps its answer when it is confident
+    enough (margin >= threshold, or entropy <= threshold). Remaining rows are
+    scored by the 48-item model. The per-tier row counters are the only state
+    that changes after loading; they are updated under a lock, since sync
+    routes score from threadpool threads.
+    """
+
+    def __init__(self, engine, item_features, dimension_features, metric, threshold, classes):
+        if metric not in CASCADE_METRICS:
+            raise ValueError(f"Unknown cascade metric: {metric} (expected one of {CASCADE_METRICS})")
+        self.engine = align_classes(engine, classes)
+        self.pool = pooling_matrix(item_features, dimension_features)
+        self.metric = metric
+        self.threshold = threshold
+        self._cutoff = threshold if metric == "margin" else -threshold
+
+        self.rows = {TIER_DIMENSIONS: 0, TIER_ITEMS: 0}
+        self._lock = threading.Lock()
+
+    def accept(self, probas):
+        return confidence(probas, self.metric) >= self._cutoff
+
+    def predict(self, x, full, k=5):
+        """Same as InferenceEngine.predict, plus the tier that answered each row."""
+        single = x.ndim == 1
+        x = np.atleast_2d(x)
+
+        probas = self.engine.predict_proba(x @ self.pool)
+        fast = self.accept(probas)
+        if not fast.all():
+            probas[~fast] = full.predict_proba(x[~fast])
+        n_fast = int(fast.sum())
+        with self._lock:
+            self.rows[TIER_DIMENSIONS] += n_fast
+            self.rows[TIER_ITEMS] += len(x) - n_fast
+
+        preds = probas.argmax(axis=-1)
+        top = full.top_k(probas, k)
+        tiers = np.where(fast, TIER_DIMENSIONS, TIER_ITEMS).astype(object)
+        if single:
+            return preds[0], top[0], probas[0], tiers[0]
+        return preds, top, probas, tiers
+
+    def stats(self):
+        with self._lock:
+            rows = dict(self.rows)
+        total = sum(rows.values())
+        return {
+            "metric": self.metric,
+            "threshold": self.threshold,
+            "rows": rows,
+            "dimensions_share": round(rows[TIER_DIMENSIONS] / total, 4) if total else 0.0,
+        }
+
+
+def relative_cost(n_items, n_dimensions, n_classes, fast_share):
+    """Multiply-adds per row of the cascade relative to always scoring the 48-item model."""
+    full = n_items * n_classes
+    fast = n_items * n_dimensions + n_dimensions * n_classes
+    return (fast + (1 - fast_share) * full) / full
+
+
+def calibrate(cascade, full, x, target_agreement=DEFAULT_TARGET_AGREEMENT, points=11):
+    """
+    Pick the lowest threshold whose cascade output still matches the 48-item model
+    on at least target_agreement of the rows x (normally the held-out split).
+    Returns (threshold, report) where the report tabulates agreement against
+    the share of rows the 6-dimension model answers.
+    """
+    fast_probas = cascade.engine.predict_proba(x @ cascade.pool)
+    conf = confidence(fast_probas, cascade.metric)
+    full_pred = full.predict_proba(x).argmax(axis=-1)
+    same = fast_probas.argmax(axis=-1) == full_pred
+
+    # Answer the most confident m rows with the fast tier; the rest always agree
+    order = np.argsort(-conf, kind="stable")
+    disagreements = np.cumsum(~same[order])
+    n = len(x)
+    agreement = 1 - np.concatenate([[0], disagreements]) / n  # index m = rows answered fast
+
+    # Only cut between distinct confidence values
+    sorted_conf = conf[order]
+    cut_ok = np.concatenate([[True], sorted_conf[:-1] > sorted_conf[1:], [True]])
+    candidates = np.flatnonzero((agreement >= target_agreement) & cut_ok)
+    m = int(candidates.max())
+    cutoff = sorted_conf[m - 1] if m > 0 else np.inf
+
+    n_items, n_dimensions = cascade.pool.shape
+
+    def row(m):
+        share = m / n
+        return {
+            "dimensions_share": round(share, 4),
+            "agreement": round(float(agreement[m]), 6),
+            "relative_cost": round(relative_cost(n_items, n_dimensions, full.n_classes, share), 4),
+        }
+
+    curve = []
+    for share in np.linspace(0, 1, points):
+        entry = row(int(round(share * n)))
+        entry["threshold"] = to_threshold(sorted_conf[int(round(share * n)) - 1], cascade.metric) if share else None
+        curve.append(entry)
+
+    report = {
+        "metric": cascade.metric,
+        "target_agreement": target_agreement,
+        "rows": n,
+        "dimensions_alone_agreement": round(float(same.mean()), 6),
+        "chosen": row(m),
+        "curve": curve,
+    }
+    return to_threshold(cutoff, cascade.metric), report
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from util.validation import normalize_likert
+
+# Prepared datasets: .npz is columnar and compactly typed, anything else is CSV
+PREPARED_FORMATS = ("npz", "csv")
+
+# String columns stored as integer codes plus their dictionary: column -> (codes, dictionary, code dtype)
+DICTIONARY_COLUMNS = {
+    "major_standard": ("labels", "classes", np.int16),
+    "major": ("majors", "major_names", np.int32),
+}
+
+
+def sorted_categorical(values):
+    """Categorical of values with only the categories in use, sorted, so codes match LabelEncoder."""
+    values = pd.Categorical(values).remove_unused_categories()
+    return values.reorder_categories(values.categories.sort_values())
+
+
+def prepared_format(path):
+    return "npz" if str(path).endswith(".npz") else "csv"
+
+
+def likert_codes(features):
+    """Normalized answers -> uint8 raw Likert codes, or None unless every value is a whole code."""
+    codes = np.asarray(features, dtype=np.float64) * 4 + 1
+    rounded = np.rint(codes)
+    if codes.size and not (np.array_equal(codes, rounded) and rounded.min() >= 0 and rounded.max() <= 255):
+        return None
+    return rounded.astype(np.uint8)
+
+
+def encode_features(features, likert):
+    """Normalized feature matrix -> the array stored in the .npz, and its name."""
+    if likert:
+        return "likert", likert_codes(features)
+    return "features", np.asarray(features, dtype=np.float32)
+
+
+def save_prepared(df, path, feature_cols):
+    """
+    Write a prepared dataset. For .npz: answers as uint8 Likert codes when
+    they are all whole codes (else float32), and the major columns as int
+    codes plus a dictionary. Other paths get the CSV the pipelines always wrote.
+    """
+    if prepared_format(path) == "csv":
+        df.to_csv(path, index=False)
+        return
+
+    features = df[feature_cols].to_numpy(dtype=np.float64)
+    name, stored = encode_features(features, likert_codes(features) is not None)
+    arrays = {"feature_names": np.array(feature_cols, dtype=str), name: stored}
+    for column, (codes_name, dictionary_name, dtype) in DICTIONARY_COLUMNS.items():
+        if column in df.columns:
+            values = sorted_categorical(df[column])
+            arrays[codes_name] = values.codes.astype(dtype)
+            arrays[dictionary_name] = np.asarray(values.categories, dtype=str)
+    write_npz(path, arrays)
+
+
+def write_npz(path, arrays):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_prepared(path):
+    """
+    Prepared dataset -> (x, labels, classes, feature_names): float64 features,
+    integer label codes and the class name of each code. Reads .npz or CSV.
+    """
+    if prepared_format(path) == "csv":
+        df = pd.read_csv(path, dtype={column: "category" for column in DICTIONARY_COLUMNS})
+        feature_names = [c for c in df.columns if c not in DICTIONARY_COLUMNS]
+        labels = sorted_categorical(df["major_standard"])
+        return (
+            df[feature_names].to_numpy(dtype=np.float64),
+            labels.codes.astype(np.int16),
+            np.asarray(labels.categories, dtype=str),
+            feature_names,
+        )
+
+    with np.load(path, allow_pickle=False) as data:
+        if "likert" in data:
+            x = normalize_likert(data["likert"].astype(np.float64))
+        else:
+            x = data["features"].astype(np.float64)
+        return x, data["labels"], data["classes"], data["feature_names"].tolist()
+
+
+def read_prepared(path):
+    """Prepared dataset as the DataFrame the CSV pipelines produce."""
+    if prepared_format(path) == "csv":
+        return pd.read_csv(path)
+
+    x, _, _, feature_names = load_prepared(path)
+    df = pd.DataFrame(x, columns=feature_names)
+    with np.load(path, allow_pickle=False) as data:
+        for column in ("major", "major_standard"):
+            codes_name, dictionary_name, _ = DICTIONARY_COLUMNS[column]
+            if codes_name in data:
+                df[column] = data[dictionary_name][data[codes_name]].astype(object)
+    return df
+
+
+class PreparedWriter:
+    """
+    Builds a prepared .npz chunk by chunk when the row count and the
+    dictionaries are known up front. Columns are filled in memory-mapped
+    scratch files, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, path, n_rows, feature_cols, classes, major_names=None, likert=True):
+        self.path = path
+        self.n_rows = n_rows
+        self.feature_cols = list(feature_cols)
+        self.likert = likert
+        self.dictionaries = {"major_standard": pd.Index(classes)}
+        if major_names is not None:
+            self.dictionaries["major"] = pd.Index(major_names)
+
+        self._dir = tempfile.mkdtemp(dir=os.path.dirname(path) or ".")
+        self._row = 0
+        feature_name = "likert" if likert else "features"
+        self.columns = {feature_name: self._scratch(feature_name, (n_rows, len(self.feature_cols)),
+                                                    np.uint8 if likert else np.float32)}
+        for column in self.dictionaries:
+            codes_name, _, dtype = DICTIONARY_COLUMNS[column]
+            self.columns[codes_name] = self._scratch(codes_name, (n_rows,), dtype)
+
+    def _scratch(self, name, shape, dtype):
+        return np.lib.format.open_memmap(os.path.join(self._dir, f"{name}.npy"), "w+", dtype, shape)
+
+    def write(self, df):
+        end = self._row + len(df)
+        name, stored = encode_features(df[self.feature_cols].to_numpy(dtype=np.float64), self.likert)
+        self.columns[name][self._row:end] = stored
+        for column, dictionary in self.dictionaries.items():
+            codes = dictionary.get_indexer(df[column])
+            if (codes < 0).any():
+                raise ValueError(f"Values missing from the {column} dictionary")
+            self.columns[DICTIONARY_COLUMNS[column][0]][self._row:end] = codes
+        self._row = end
+
+    def close(self):
+        try:
+            if self._row != self.n_rows:
+                raise ValueError(f"Expected {self.n_rows} rows, got {self._row}")
+            arrays = {"feature_names": np.array(self.feature_cols, dtype=str), **self.columns}
+            for column, dictionary in self.dictionaries.items():
+                arrays[DICTIONARY_COLUMNS[column][1]] = np.asarray(dictionary, dtype=str)
+            write_npz(self.path, arrays)
+        finally:
+            self.columns = {}
+            shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df):
+    """One uint64 per row of df, independent of the index."""
+    # A chunk with missing values reads an int column as float; 5 and 5.0 must hash alike
+    numeric = df.select_dtypes("number").columns
+    return pd.util.hash_pandas_object(df.astype({c: "float64" for c in numeric}), index=False).to_numpy()
+
+
+class RowHashSet:
+    """
+    Rows seen so far, kept as a sorted array of 64-bit row hashes (8 bytes
+    per distinct row), so duplicates can be dropped across the chunks of a
+    file that is never fully in memory. Distinct rows collide with
+    negligible probability.
+    """
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._seen)
+
+    def first_seen(self, df):
+        """Mask of rows seen for the first time, in this chunk or any before it. Records them."""
+        hashes = hash_rows(df)
+        _, first = np.unique(hashes, return_index=True)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[first] = True
+
+        if len(self._seen):
+            pos = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            mask &= self._seen[pos] != hashes
+
+        # Both inputs are sorted, so the stable sort is a linear merge
+        self._seen = np.sort(np.concatenate([self._seen, np.sort(hashes[mask])]), kind="stable")
+        return mask
@@ -0,0 +1,78 @@
+from util.metrics import set_route_label
+
+
+class FallThrough(Exception):
+    """Raised by a fast-path handler for requests it leaves to the full app."""
+
+
+class FastPathMiddleware:
+    """
+    Raw ASGI middleware answering `POST path` itself, skipping routing,
+    request objects and pydantic. `handler(content_type, body)` returns
+    (body bytes, model version); if it raises, the already-read body is
+    replayed to the wrapped app, which produces the usual response or error.
+    Every other request goes straight through. `outcomes` is an optional
+    counter labelled by outcome (served / fell_through).
+    """
+
+    def __init__(self, app, path, handler, outcomes=None):
+        self.app = app
+        self.path = path
+        self.handler = handler
+        self.served = outcomes.labels("served") if outcomes is not None else None
+        self.fell_through = outcomes.labels("fell_through") if outcomes is not None else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        content_type = ""
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+                break
+
+        try:
+            content, version = await self.handler(content_type, body)
+        except Exception:
+            if self.fell_through is not None:
+                self.fell_through.inc()
+            return await self.app(scope, self._replay(body, receive), send)
+
+        set_route_label(scope, self.path)
+
+        if self.served is not None:
+            self.served.inc()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-length", str(len(content)).encode()),
+                (b"content-type", b"application/json"),
+                (b"x-model-version", version.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    def _replay(body, receive):
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
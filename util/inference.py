@@ -0,0 +1,170 @@
+import warnings
+import numpy as np
+
+# Probabilities are returned rounded to this many decimals by the API
+PRINT_DECIMALS = 3
+
+
+class InferenceEngine:
+    """Multinomial logistic regression scored with plain NumPy."""
+
+    def __init__(self, weights, bias, classes):
+        # weights: (n_features, n_classes), bias: (n_classes,)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float64)
+        self.classes = np.asarray(classes, dtype=object)
+
+        if self.weights.ndim != 2 or self.bias.shape != (self.weights.shape[1],):
+            raise ValueError("weights must be (n_features, n_classes) and bias (n_classes,)")
+        if len(self.classes) != self.weights.shape[1]:
+            raise ValueError("Number of class names does not match the weight matrix")
+
+    @classmethod
+    def from_sklearn(cls, model, encoder):
+        """Copy coef_/intercept_ out of a fitted multinomial LogisticRegression."""
+        coef = np.asarray(model.coef_)
+        if coef.shape[0] < 3 or getattr(model, "multi_class", None) == "ovr":
+            raise ValueError("Only multinomial models with 3+ classes are supported")
+
+        # model.classes_ holds encoded labels; map them back to names once
+        classes = encoder.inverse_transform(model.classes_)
+        return cls(coef.T, model.intercept_, classes)
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    @property
+    def n_classes(self):
+        return self.weights.shape[1]
+
+    def logits(self, x):
+        return x @ self.weights + self.bias
+
+    def predict_proba(self, x):
+        """Softmax over classes for a (n_features,) vector or (n, n_features) matrix."""
+        z = self.logits(x)
+        z -= z.max(axis=-1, keepdims=True)
+        np.exp(z, out=z)
+        z /= z.sum(axis=-1, keepdims=True)
+        return z
+
+    def top_k(self, probas, k=5):
+        """Indices of the k most probable classes, highest first."""
+        k = min(k, probas.shape[-1])
+        idx = np.argpartition(-probas, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(probas, idx, axis=-1), axis=-1, kind="stable")
+        return np.take_along_axis(idx, order, axis=-1)
+
+    def predict(self, x, k=5):
+        """Return (predicted class index, top-k indices, probabilities)."""
+        probas = self.predict_proba(x)
+        return probas.argmax(axis=-1), self.top_k(probas, k), probas
+
+    def verify_against(self, model, n_samples=256, seed=0):
+        """
+        Check that this engine reproduces model.predict / predict_proba.
+        Raises ValueError on any mismatch visible in the API output.
+        """
+        rng = np.random.default_rng(seed)
+        x = np.vstack([
+            np.zeros(self.n_features),
+            np.ones(self.n_features),
+            rng.random((n_samples, self.n_features)),
+        ])
+
+        with warnings.catch_warnings():
+            # Model was fitted on a DataFrame; plain arrays are fine here
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            expected = model.predict_proba(x)
+            expected_pred = model.predict(x)
+        pred, _, probas = self.predict(x)
+
+        if not np.array_equal(model.classes_[pred], expected_pred):
+            raise ValueError("Predicted labels differ from the sklearn model")
+
+        # Equal to well below the last printed digit
+        max_diff = float(np.abs(probas - expected).max())
+        if max_diff > 10 ** -(PRINT_DECIMALS + 6):
+            raise ValueError(f"Probabilities differ from the sklearn model (max diff {max_diff:.2e})")
+
+        return max_diff
+
+
+# Storage dtypes for quantized weights; scoring runs in float32 either way
+QUANTIZED_DTYPES = ("int8", "float16")
+
+
+def quantize_weights(weights, dtype):
+    """
+    (n_features, n_classes) float weights -> (quantized weights, per-class scales or None).
+    int8 uses one symmetric scale per class column, so w ≈ q * scale.
+    """
+    if dtype == "float16":
+        return weights.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(weights).max(axis=0) / 127
+        scales[scales == 0] = 1.0
+        return np.rint(weights / scales).astype(np.int8), scales
+    raise ValueError(f"Unsupported quantization dtype: {dtype} (expected one of {QUANTIZED_DTYPES})")
+
+
+class QuantizedEngine(InferenceEngine):
+    """
+    InferenceEngine over int8 or float16 weights. The quantized weights are the
+    on-disk format; they are dequantized once into a float32 matrix, so each
+    call is one float32 product. Probabilities are returned as float64, so
+    rounding and rendering match the float64 engine.
+    """
+
+    def __init__(self, weights, scales, bias, classes):
+        self.weights = np.ascontiguousarray(weights)
+        if self.weights.dtype.name not in QUANTIZED_DTYPES:
+            raise ValueError(f"Quantized weights must be one of {QUANTIZED_DTYPES}, got {self.weights.dtype}")
+        self.scales = None if scales is None else np.ascontiguousarray(scales, dtype=np.float32)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float64)
+        self.classes = np.asarray(classes, dtype=object)
+        self._bias32 = self.bias.astype(np.float32)
+
+        if self.weights.ndim != 2 or self.bias.shape != (self.weights.shape[1],):
+            raise ValueError("weights must be (n_features, n_classes) and bias (n_classes,)")
+        if self.scales is not None and self.scales.shape != self.bias.shape:
+            raise ValueError("int8 weights need one scale per class")
+        if len(self.classes) != self.weights.shape[1]:
+            raise ValueError("Number of class names does not match the weight matrix")
+
+        self._weights32 = self.weights.astype(np.float32)
+        if self.scales is not None:
+            self._weights32 *= self.scales
+
+    @classmethod
+    def from_engine(cls, engine, dtype):
+        weights, scales = quantize_weights(engine.weights, dtype)
+        return cls(weights, scales, engine.bias, engine.classes)
+
+    @property
+    def dtype(self):
+        return self.weights.dtype.name
+
+    def logits(self, x):
+        z = np.asarray(x, dtype=np.float32) @ self._weights32
+        z += self._bias32
+        return z
+
+    def predict_proba(self, x):
+        return super().predict_proba(x).astype(np.float64)
+
+    def agreement(self, reference, x, k=5):
+        """
+        Compare with a float64 engine on (n, n_features) rows: share of rows with the
+        same top-1 class, the same top-k set, and the largest probability difference.
+        """
+        ref_pred, ref_top, ref_probas = reference.predict(x, k)
+        pred, top, probas = self.predict(x, k)
+        same_top_k = (np.sort(ref_top, axis=1) == np.sort(top, axis=1)).all(axis=1)
+        return {
+            "rows": len(x),
+            "top1_agreement": round(float((ref_pred == pred).mean()), 6),
+            f"top{k}_agreement": round(float(same_top_k.mean()), 6),
+            "max_prob_diff": float(np.abs(ref_probas - probas).max()),
+        }
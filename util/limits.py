@@ -0,0 +1,34 @@
+from util.metrics import set_route_label
+from util.responses import dumps
+
+
+class BodyLimitMiddleware:
+    """
+    Raw ASGI middleware refusing requests to the paths in `limits`
+    ({path: (max bytes, detail)}) whose Content-Length is larger, with 413,
+    before any body is read or parsed. Other requests pass straight through.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        max_bytes, detail = limit
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    set_route_label(scope, scope["path"])
+                    await send({
+                        "type": "http.response.start",
+                        "status": 413,
+                        "headers": [(b"content-type", b"application/json")],
+                    })
+                    await send({"type": "http.response.body", "body": dumps({"detail": detail})})
+                    return
+                break
+        await self.app(scope, receive, send)
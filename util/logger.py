@@ -1,9 +1,114 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
+import queue
+import random
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, rotation stays per-process
+    fcntl = None
 
-def get_logger(name: str, log_file: str = "app.log") -> logging.Logger:
+# One background writer per log file, shared by every queued logger using it
+_listeners = {}
+
+
+class LockedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that is safe to share between processes
+    (e.g. several uvicorn workers writing logs/app.log).
+
+    Writes and rollovers happen under an exclusive lock on "<file>.lock",
+    and the stream is reopened when another process has rotated the file.
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.lock_path = self.baseFilename + ".lock"
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                super().emit(record)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            rotated = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = self._open()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueues records untouched so message formatting runs on the writer thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class LazyStr:
+    """Defers an expensive str() until the record is actually formatted."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __str__(self):
+        return str(self.fn())
+
+
+class PayloadSampler:
+    """Decides which requests get their full payload logged (rate 0–1)."""
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+
+    def __call__(self):
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+def stop_listeners():
+    """Flush queued records and stop the background writers."""
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
+atexit.register(stop_listeners)
+
+
+def _make_handlers(full_path, formatter):
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    # Rotating file handler
+    file_handler = LockedRotatingFileHandler(
+        full_path, maxBytes=5_000_000, backupCount=3, encoding="utf-8"
+    )
+    file_handler.setFormatter(formatter)
+
+    return console_handler, file_handler
+
+
+def get_logger(name: str, log_file: str = "app.log", queued: bool = False) -> logging.Logger:
+    """
+    With queued=True the caller only enqueues records; a single background
+    thread per log file formats them and writes to console and file.
+    """
     logger = logging.getLogger(name)
 
     # Avoid duplicate handlers
@@ -28,17 +133,15 @@ def get_logger(name: str, log_file: str = "app.log") -> logging.Logger:
         datefmt="%Y-%m-%d %H:%M:%S"
     )
 
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    # Rotating file handler
-    file_handler = RotatingFileHandler(
-        full_path, maxBytes=5_000_000, backupCount=3, encoding="utf-8"
-    )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    if queued:
+        key = os.path.abspath(full_path)
+        if key not in _listeners:
+            _listeners[key] = QueueListener(queue.SimpleQueue(), *_make_handlers(full_path, formatter))
+            _listeners[key].start()
+        logger.addHandler(DeferredQueueHandler(_listeners[key].queue))
+    else:
+        for handler in _make_handlers(full_path, formatter):
+            logger.addHandler(handler)
 
     logger.propagate = False
 
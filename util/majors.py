@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from rapidfuzz import process, fuzz
+
+from util.categories_list import standardized_categories
+from util.major_mapping import major_mapping
+
+# WRatio score a fuzzy match needs to be accepted; below it the major is "Other"
+FUZZY_THRESHOLD = 70
+
+# Cleaned major -> standardized major, reused across prep runs
+RESOLUTION_CACHE_PATH = "data/major_resolutions.json"
+
+# Any change to these (or to FUZZY_THRESHOLD) invalidates the cache
+RESOLUTION_SOURCES = ("util/major_mapping.py", "util/categories_list.py")
+
+# Major columns are read as categoricals: one string per distinct major, int codes per row
+MAJOR_DTYPES = {"major": "category", "major_standard": "category"}
+
+# Unique strings scored per cdist call; bounds the (block, n_categories) score matrix
+FUZZY_BLOCK_SIZE = 10_000
+
+
+def fuzzy_match_unique(strings, choices=standardized_categories, threshold=FUZZY_THRESHOLD,
+                       workers=-1, block_size=FUZZY_BLOCK_SIZE):
+    """
+    Best WRatio match for each distinct string -> {string: category or "Other"}.
+    Same result as process.extractOne per string, but every string is scored
+    once, in batched process.cdist calls spread over all cores.
+    """
+    queries = list(dict.fromkeys(strings))
+    choices = list(choices)
+    resolved = {}
+    for start in range(0, len(queries), block_size):
+        block = queries[start:start + block_size]
+        scores = process.cdist(block, choices, scorer=fuzz.WRatio, dtype=np.float64, workers=workers)
+        best = scores.argmax(axis=1)
+        best_score = scores[np.arange(len(block)), best]
+        for query, i, score in zip(block, best.tolist(), best_score.tolist()):
+            resolved[query] = choices[i] if score >= threshold else "Other"
+    return resolved
+
+
+def map_categories(values, func):
+    """
+    Series -> categorical Series of func applied to its distinct values only,
+    not to every row. func takes and returns a Series of categories;
+    categories it maps to the same value are merged.
+    """
+    values = values.astype("category").cat.remove_unused_categories()
+    inverse, categories = pd.factorize(func(pd.Series(values.cat.categories)))
+    codes = values.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+
+
+def clean_majors(values):
+    """Raw majors -> lowercase letters and spaces, as a categorical Series."""
+    return map_categories(
+        values,
+        lambda s: s.astype(str).str.lower().str.replace(r"[^a-z ]", "", regex=True).str.strip(),
+    )
+
+
+def resolution_version(sources=RESOLUTION_SOURCES, threshold=FUZZY_THRESHOLD):
+    """Content hash of the mapping, the category list and the threshold."""
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256(f"threshold={threshold}".encode())
+    for path in sources:
+        with open(os.path.join(here, path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load_resolutions(path=RESOLUTION_CACHE_PATH, version=None):
+    """Cached resolutions, or {} when the file is missing or was built from other sources."""
+    version = version or resolution_version()
+    try:
+        with open(path, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cached.get("version") != version:
+        return {}
+    return cached["resolutions"]
+
+
+def save_resolutions(resolutions, path=RESOLUTION_CACHE_PATH, version=None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version or resolution_version(), "resolutions": resolutions}, f)
+    os.replace(tmp_path, path)
+
+
+def resolve_majors(cleaned, logger=None, fuzzy=True, cache_path=RESOLUTION_CACHE_PATH):
+    """
+    Cleaned majors -> standardized majors as a categorical Series:
+    major_mapping first, then fuzzy matching for values the mapping leaves
+    unchanged. Both run once per distinct major. With fuzzy=True,
+    resolutions persist in cache_path, so only strings never seen before
+    reach the fuzzy matcher.
+    """
+    if not fuzzy:
+        return map_categories(cleaned, lambda s: s.map(major_mapping).fillna(s))
+
+    cleaned = cleaned.astype("category").cat.remove_unused_categories()
+    resolutions = load_resolutions(cache_path) if cache_path else {}
+    unique = cleaned.cat.categories
+    new = [s for s in unique if s not in resolutions]
+
+    mapped = {s: major_mapping.get(s, s) for s in new}
+    unmatched = [s for s, m in mapped.items() if m == s]
+    resolutions.update(mapped)
+    if unmatched:
+        start = time.perf_counter()
+        resolutions.update(fuzzy_match_unique(unmatched))
+        elapsed = time.perf_counter() - start
+        if logger is not None:
+            rate = len(unmatched) / elapsed if elapsed > 0 else float("inf")
+            logger.info(f"Fuzzy matching: {len(unmatched)} new strings in {elapsed:.2f}s ({rate:,.0f} strings/s)")
+
+    if logger is not None:
+        logger.info(
+            f"Major resolution: {len(unique)} unique of {len(cleaned)} rows, "
+            f"{len(unique) - len(new)} from cache, {len(new)} new"
+        )
+    if cache_path and new:
+        save_resolutions(resolutions, cache_path)
+    return map_categories(cleaned, lambda s: s.map(resolutions))
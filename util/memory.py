@@ -0,0 +1,49 @@
+import os
+
+# Fields of /proc/<pid>/smaps_rollup reported per process (values in kB)
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def process_memory(pid=None):
+    """
+    Resident memory of a process split into shared and private pages, in MB.
+    Returns None where /proc/<pid>/smaps_rollup is unavailable (non-Linux).
+    """
+    path = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    values = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in SMAPS_FIELDS:
+            values[key] = int(rest.split()[0])
+
+    return {
+        "rss_mb": round(values.get("Rss", 0) / 1024, 2),
+        "pss_mb": round(values.get("Pss", 0) / 1024, 2),
+        "shared_mb": round((values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)) / 1024, 2),
+        "private_mb": round((values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024, 2),
+    }
+
+
+def mapping_memory(path, pid=None):
+    """Shared/private resident kB of one memory-mapped file in a process (Linux only)."""
+    target = os.path.abspath(path)
+    totals = {"Rss": 0, "Shared_Clean": 0, "Shared_Dirty": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    try:
+        with open(f"/proc/{pid or os.getpid()}/smaps") as f:
+            inside = False
+            for line in f:
+                fields = line.split()
+                if "-" in fields[0] and ":" not in fields[0]:
+                    # Mapping header: address range, perms, offset, dev, inode, path
+                    inside = len(fields) >= 6 and fields[5] == target
+                elif inside and fields[0].rstrip(":") in totals:
+                    totals[fields[0].rstrip(":")] += int(fields[1])
+    except OSError:
+        return None
+    return totals
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+import numpy as np
+
+from util.artifacts import (
+    artifact_paths, fingerprint, bundle_exists, load_bundle, load_shared, load_quantized,
+    load_cascade, load_pickle_artifacts,
+)
+from util.cascade import Cascade
+from util.inference import InferenceEngine
+from util.responses import LabelTable
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """
+    Everything needed to serve one model version; never mutated after loading,
+    apart from the cascade's locked row counters.
+    """
+    engine: InferenceEngine
+    labels: LabelTable
+    feature_list: tuple
+    version: str
+    source: str
+    loaded_at: float = field(default_factory=time.time)
+    cascade: Cascade = None
+
+    def predict(self, x, k=5):
+        """engine.predict plus the tier that answered each row (None without a cascade)."""
+        if self.cascade is None:
+            return (*self.engine.predict(x, k), None)
+        return self.cascade.predict(x, self.engine, k)
+
+    def score_rows(self, x):
+        """Score an (n, 48) matrix in one call -> predictions, top-5 indices, rounded top-5 probabilities, tiers."""
+        preds, top5_idx, probas, tiers = self.predict(x, k=5)
+        top5_probs = np.take_along_axis(probas, top5_idx, axis=1).round(3)
+        tiers = [None] * len(preds) if tiers is None else tiers.tolist()
+        return preds.tolist(), top5_idx.tolist(), top5_probs.tolist(), tiers
+
+    def render_rows(self, x):
+        """Score an (n, 48) matrix in one call, one encoded response body per row."""
+        return [self.labels.render(*row) for row in zip(*self.score_rows(x))]
+
+    def render_one(self, x):
+        pred, top5_idx, probas, tier = self.predict(x, k=5)
+        return self.labels.render(int(pred), top5_idx.tolist(), probas[top5_idx].round(3).tolist(), tier)
+
+
+# Lowest top-1 agreement with the float64 model accepted for quantized weights
+DEFAULT_MIN_AGREEMENT = 0.98
+
+
+def load_snapshot(model_format="auto", min_agreement=DEFAULT_MIN_AGREEMENT, cascade=False):
+    """
+    Load and check the artifacts selected by MODEL_FORMAT (auto / pickle / mmap / quantized).
+    With cascade=True the 6-dimension first tier is loaded in front of it.
+    """
+    paths = artifact_paths(model_format, cascade)
+    version = fingerprint(paths)
+
+    if model_format == "mmap":
+        engine, feature_list, _ = load_shared()
+        source = "mmap"
+    elif model_format == "quantized":
+        engine, feature_list, _ = load_quantized(min_agreement=min_agreement)
+        source = f"quantized-{engine.dtype}"
+    elif model_format != "pickle" and bundle_exists():
+        # No sklearn or pandas import on this path
+        engine, feature_list, _ = load_bundle()
+        source = "bundle"
+    else:
+        # Weights are copied out once; requests never touch sklearn
+        engine, feature_list, _, _ = load_pickle_artifacts()
+        source = "pickle"
+
+    # Smoke test before the snapshot can be served
+    probas = engine.predict_proba(np.vstack([np.zeros(engine.n_features), np.ones(engine.n_features)]))
+    if not np.isfinite(probas).all() or not np.allclose(probas.sum(axis=1), 1.0):
+        raise ValueError("Model produced invalid probabilities")
+
+    first_tier = None
+    if cascade:
+        fast, dimension_features, calibration = load_cascade()
+        first_tier = Cascade(
+            fast, feature_list, dimension_features,
+            calibration["metric"], calibration["threshold"], engine.classes,
+        )
+        source += "+cascade"
+
+    return ModelSnapshot(
+        engine, LabelTable(engine.classes), tuple(feature_list), version, source, cascade=first_tier,
+    )
+
+
+class ModelStore:
+    """
+    Holds the active ModelSnapshot. Reloads build a new snapshot off to the
+    side and swap it in with a single reference assignment, so requests that
+    already read `current` finish on the version they started with.
+    """
+
+    def __init__(self, model_format="auto", logger=None, min_agreement=DEFAULT_MIN_AGREEMENT, cascade=False):
+        self.model_format = model_format
+        self.logger = logger
+        self.min_agreement = min_agreement
+        self.cascade = cascade
+        self.current = load_snapshot(model_format, min_agreement, cascade)
+        self.on_swap = []
+
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+
+    def reload(self):
+        """Load, validate and activate the artifacts on disk. Raises on failure, keeping the old snapshot."""
+        with self._reload_lock:
+            previous = self.current
+            try:
+                snapshot = load_snapshot(self.model_format, self.min_agreement, self.cascade)
+                if snapshot.feature_list != previous.feature_list:
+                    raise ValueError("Feature list changed; restart the service to change the input contract")
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                raise
+
+            self.current = snapshot
+            self.reloads += 1
+            self.last_error = None
+            for callback in self.on_swap:
+                callback(snapshot)
+            return snapshot
+
+    def _signature(self):
+        sig = []
+        for path in artifact_paths(self.model_format, self.cascade):
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append((path, None, None))
+        return sig
+
+    def watch(self, interval):
+        """Poll the artifact files and reload once a changed set has stopped changing."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            loaded = pending = self._signature()
+            while True:
+                time.sleep(interval)
+                sig = self._signature()
+                if sig == loaded or sig != pending:
+                    # Unchanged, or still being written: wait for it to settle
+                    pending = sig
+                    continue
+                loaded = sig
+                try:
+                    snapshot = self.reload()
+                    if self.logger:
+                        self.logger.info("Model reloaded | version=%s", snapshot.version)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error("Model reload failed: %s", e)
+
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stats(self):
+        snap = self.current
+        return {
+            "version": snap.version,
+            "source": snap.source,
+            "loaded_at": snap.loaded_at,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+            "cascade": snap.cascade.stats() if snap.cascade is not None else None,
+        }
@@ -0,0 +1,65 @@
+import json
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads(data):
+    """Parse JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through orjson when available."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class LabelTable:
+    """
+    Class names decoded once from the label encoder, plus pre-encoded JSON
+    fragments so prediction bodies are assembled by indexing and joining bytes.
+    """
+
+    def __init__(self, classes):
+        self.names = [str(c) for c in classes]
+        self._head = [
+            b'{"predicted_major":' + dumps(name) + b',"top_5_predictions":['
+            for name in self.names
+        ]
+        self._entry = [b'{"major":' + dumps(name) + b',"probability":' for name in self.names]
+
+    def __len__(self):
+        return len(self.names)
+
+    def render(self, pred, top_idx, top_probs, tier=None, row=None) -> bytes:
+        """
+        JSON body for one prediction, byte-identical to serializing
+        {"predicted_major": ..., "top_5_predictions": [{"major": ..., "probability": ...}]}
+        (plus "tier" and a leading "row" when given). top_probs must already
+        be rounded Python floats.
+        """
+        entries = b",".join(
+            self._entry[i] + repr(p).encode() + b"}" for i, p in zip(top_idx, top_probs)
+        )
+        body = self._head[pred] + entries + b"]}"
+        if tier is not None:
+            body = body[:-1] + b',"tier":' + dumps(tier) + b"}"
+        if row is not None:
+            body = b'{"row":' + str(row).encode() + b"," + body[1:]
+        return body
@@ -0,0 +1,143 @@
+import numpy as np
+from starlette.responses import StreamingResponse
+
+from util.responses import dumps, loads
+from util.validation import FEATURE_RANGE, LIKERT_RANGE, normalize_likert, valid_rows
+
+CSV_CONTENT_TYPES = ("text/csv",)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+# Rows parsed and scored together; bounds memory regardless of upload size
+DEFAULT_CHUNK_ROWS = 1000
+
+# A single line longer than this is treated as a malformed upload
+MAX_LINE_BYTES = 1_000_000
+
+
+class FullDuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that does not listen for disconnects while streaming.
+    The stock class consumes receive() in a background task, which would
+    swallow request body chunks that the generator is still reading.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(chunks):
+    """Split an async stream of byte chunks into non-empty lines (no terminators)."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if line:
+                yield line
+    pending = pending.rstrip(b"\r")
+    if pending:
+        yield pending
+
+
+def csv_columns(header, feature_list):
+    """Positions of the feature columns in a CSV header line."""
+    names = [name.strip().strip('"') for name in header.decode("utf-8").split(",")]
+    missing = [f for f in feature_list if f not in names]
+    if missing:
+        raise ValueError(f"CSV header is missing feature columns: {', '.join(missing[:5])}")
+    return [names.index(f) for f in feature_list], len(names)
+
+
+def parse_csv_rows(lines, columns, n_columns):
+    """CSV lines -> (float matrix, per-row error or None)."""
+    errors = [None] * len(lines)
+    fields = []
+    for i, line in enumerate(lines):
+        parts = line.split(b",")
+        if len(parts) != n_columns:
+            errors[i] = f"Expected {n_columns} columns, got {len(parts)}"
+            parts = [b"nan"] * n_columns
+        fields.append([parts[c] for c in columns])
+
+    try:
+        x = np.array(fields, dtype=np.bytes_).astype(np.float64)
+    except ValueError:
+        # Some value is not a number: convert row by row to pinpoint it
+        x = np.full((len(lines), len(columns)), np.nan)
+        for i, row in enumerate(fields):
+            try:
+                x[i] = np.array(row, dtype=np.bytes_).astype(np.float64)
+            except ValueError:
+                errors[i] = errors[i] or "Non-numeric feature value"
+    return x, errors
+
+
+def parse_ndjson_rows(lines, n_features):
+    """NDJSON lines ({"features": [...]} or a bare list) -> (float matrix, per-row error or None)."""
+    errors = [None] * len(lines)
+    x = np.full((len(lines), n_features), np.nan)
+    for i, line in enumerate(lines):
+        try:
+            record = loads(line)
+            row = record["features"] if isinstance(record, dict) else record
+            if len(row) != n_features:
+                errors[i] = f"Expected {n_features} features, got {len(row)}"
+                continue
+            x[i] = row
+        except (ValueError, TypeError, KeyError):
+            errors[i] = "Invalid JSON row"
+    return x, errors
+
+
+async def stream_predictions(lines, parse, snapshot, chunk_rows=DEFAULT_CHUNK_ROWS, likert=False,
+                             on_done=None):
+    """
+    Score lines in fixed-size chunks and yield one NDJSON result line per row.
+    `parse(lines)` returns (matrix, errors) for one chunk; `on_done(rows, errors)`
+    is called once the upload has been fully scored.
+    """
+    low, high = LIKERT_RANGE if likert else FEATURE_RANGE
+    row_offset = 0
+    n_errors = 0
+    chunk = []
+
+    def flush(chunk, row_offset):
+        nonlocal n_errors
+        x, errors = parse(chunk)
+        ok = valid_rows(x, low, high) & np.array([e is None for e in errors])
+        if likert:
+            x = normalize_likert(x)
+
+        out = []
+        if ok.any():
+            scored = iter(zip(*snapshot.score_rows(x[ok])))
+        for i, good in enumerate(ok.tolist()):
+            row = row_offset + i
+            if good:
+                out.append(snapshot.labels.render(*next(scored), row=row))
+            else:
+                n_errors += 1
+                error = errors[i] or f"Feature values must be within [{low}, {high}]"
+                out.append(dumps({"row": row, "error": error}))
+        return b"\n".join(out) + b"\n"
+
+    try:
+        async for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_rows:
+                yield flush(chunk, row_offset)
+                row_offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield flush(chunk, row_offset)
+            row_offset += len(chunk)
+    except ValueError as e:
+        yield dumps({"error": str(e)}) + b"\n"
+
+    if on_done is not None:
+        on_done(row_offset, n_errors)
@@ -0,0 +1,46 @@
+import numpy as np
+
+# Request body formats accepted by /predict besides JSON
+FLOAT32_CONTENT_TYPE = "application/octet-stream"
+LIKERT_CONTENT_TYPE = "application/x-riasec-likert"
+
+# Normalized features live in [0, 1]; raw Likert answers in [1, 5]
+FEATURE_RANGE = (0.0, 1.0)
+LIKERT_RANGE = (1, 5)
+
+
+def normalize_likert(x):
+    """Raw 1–5 answers -> [0, 1], the scaling the model was trained on (see prepare_data_48.py)."""
+    return (x - 1) / 4
+
+
+def validate_features(x, n_features, low=FEATURE_RANGE[0], high=FEATURE_RANGE[1]):
+    """
+    Check shape and value range of a single feature vector in one step.
+    NaN fails the range comparison, so it is rejected as well.
+    """
+    if x.shape != (n_features,):
+        raise ValueError(f"Expected {n_features} features, got {x.size}")
+    if not ((x >= low) & (x <= high)).all():
+        raise ValueError(f"Feature values must be within [{low}, {high}]")
+    return x
+
+
+def valid_rows(x, low=FEATURE_RANGE[0], high=FEATURE_RANGE[1]):
+    """Boolean mask of rows in an (n, n_features) matrix whose values are all in range."""
+    return ((x >= low) & (x <= high)).all(axis=1)
+
+
+def decode_float32(body, n_features):
+    """Packed little-endian float32 body -> validated float64 vector."""
+    if len(body) != 4 * n_features:
+        raise ValueError(f"Expected {4 * n_features} bytes of float32, got {len(body)}")
+    x = np.frombuffer(body, dtype="<f4").astype(np.float64)
+    return validate_features(x, n_features)
+
+
+def decode_likert(body, n_features):
+    """One uint8 Likert answer (1–5) per item -> validated, normalized vector."""
+    raw = np.frombuffer(body, dtype=np.uint8)
+    validate_features(raw, n_features, *LIKERT_RANGE)
+    return normalize_likert(raw)